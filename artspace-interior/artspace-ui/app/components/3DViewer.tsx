@@ -189,6 +189,51 @@ export const ThreeDViewer = ({
       furnitureGroupRef.current = furnitureGroup
       sceneRef.current.add(furnitureGroup)
 
+      // Pieces without stored code are generated together; the server fans the
+      // requests out concurrently, so the wait is the slowest piece, not the sum
+      const pending = items.filter((item) => !item.generated_code)
+      const generated: Record<string, { code: string; source: string }> = {}
+      if (pending.length > 0) {
+        setLoadingFurniture((prev) => [...prev, ...pending.map((item) => item.id)])
+        try {
+          const response = await fetch('http://localhost:8000/api/generate-3d/batch', {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+              pieces: pending.map((item) => ({
+                furniture_type: item.subcategory || item.category || 'furniture',
+                style: item.styleTags?.join(' ') || item.style_tags?.join(' ') || selectedStyles.join(' ') || 'modern',
+                colors: Array.isArray(item.colors) ? item.colors : [item.colors || 'neutral'],
+                materials: item.materials || ['wood'],
+                dimensions: item.dimensions
+                  ? {
+                      width: item.dimensions.width / 39.37,
+                      depth: item.dimensions.depth / 39.37,
+                      height: item.dimensions.height / 39.37
+                    }
+                  : undefined
+              }))
+            })
+          })
+
+          if (response.ok) {
+            const data = await response.json()
+            data.results.forEach((result: { code: string; source: string }, index: number) => {
+              generated[pending[index].id] = result
+            })
+          } else {
+            console.error(`Furniture generation failed with status ${response.status}`)
+          }
+        } catch (generationError) {
+          console.error('Failed to generate furniture:', generationError)
+        } finally {
+          const pendingIds = new Set(pending.map((item) => item.id))
+          setLoadingFurniture((prev) => prev.filter((id) => !pendingIds.has(id)))
+        }
+      }
+
       for (let i = 0; i < items.length; i++) {
         const item = items[i]
         if (cancelled) break
@@ -207,40 +252,16 @@ export const ThreeDViewer = ({
             }
           }
 
-          if (!furnitureObject) {
+          const result = generated[item.id]
+          if (!furnitureObject && result) {
             try {
-              const response = await fetch('http://localhost:8000/api/generate-3d', {
-                method: 'POST',
-                headers: {
-                  'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                  furniture_type: item.subcategory || item.category || 'furniture',
-                  style: item.styleTags?.join(' ') || item.style_tags?.join(' ') || selectedStyles.join(' ') || 'modern',
-                  colors: Array.isArray(item.colors) ? item.colors : [item.colors || 'neutral'],
-                  materials: item.materials || ['wood'],
-                  dimensions: item.dimensions
-                    ? {
-                        width: item.dimensions.width / 39.37,
-                        depth: item.dimensions.depth / 39.37,
-                        height: item.dimensions.height / 39.37
-                      }
-                    : undefined
-                })
-              })
-
-              if (response.ok) {
-                const data = await response.json()
-                const func = new Function('THREE', `\n${data.code}\nif (typeof createFurniture === 'function') {\n  return createFurniture();\n} else {\n  throw new Error('createFurniture function not found');\n}\n`)
-                furnitureObject = func(THREE)
-                if (data.source === 'fallback') {
-                  console.warn(`Using fallback furniture code for ${item.id}`)
-                }
-              } else {
-                console.error(`Furniture generation failed for ${item.id} with status ${response.status}`)
+              const func = new Function('THREE', `\n${result.code}\nif (typeof createFurniture === 'function') {\n  return createFurniture();\n} else {\n  throw new Error('createFurniture function not found');\n}\n`)
+              furnitureObject = func(THREE)
+              if (result.source === 'fallback') {
+                console.warn(`Using fallback furniture code for ${item.id}`)
               }
-            } catch (generationError) {
-              console.error(`Failed to generate furniture ${item.id}:`, generationError)
+            } catch (executionError) {
+              console.error(`Failed to execute generated code for ${item.id}:`, executionError)
             }
           }
 
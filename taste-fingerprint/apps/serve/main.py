@@ -5,20 +5,21 @@ import base64
 import json
 import logging
 import os
+import secrets
 import shutil
 import tempfile
 import time
 from collections import Counter
-from contextlib import ExitStack
+from contextlib import ExitStack, asynccontextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 from urllib.parse import urlparse
 
 import chromadb
 import httpx
 import numpy as np
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import Depends, FastAPI, Header, HTTPException, UploadFile, File, Form, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
@@ -29,14 +30,18 @@ from services.claude import (
     ClaudeSettingsError,
     summarize_taste,
     recommend_products,
+    arecommend_products,
     craft_room_edit_prompt,
 )
 from services.claude_3d_generator import Claude3DGenerator
-from services.complete_room_generator import CompleteRoomGenerator
+from services.complete_room_generator import CompleteRoomGenerator, warm_up_client
+from services.embeddings import warm_up as warm_up_clip
 from services.furniture import (
-    FurnitureSearchService,
+    get_furniture_service,
+    remember_user_preference_vector,
     search_furniture_semantically,
 )
+from services.retry import is_transient_error
 
 logger = logging.getLogger(__name__)
 
@@ -51,13 +56,40 @@ CHROMA_DATABASE = os.getenv("CHROMA_DATABASE")
 ANTHROPIC_MODEL = os.getenv("ANTHROPIC_MODEL", "claude-sonnet-4-5-20250929")
 OPENAI_IMAGE_MODEL = os.getenv("OPENAI_IMAGE_MODEL", "gpt-image-1")
 GENERATED_ROOT = Path(os.getenv("GENERATED_IMAGE_DIR", Path(__file__).resolve().parent / "generated"))
+CHROMA_RETRIES = max(1, int(os.getenv("CHROMA_RETRIES", "3")))
+# Upper bound on pieces per /api/generate-3d/batch call (a furnished room, not a catalog)
+MAX_BATCH_PIECES = 24
+# Shared secret for maintenance endpoints (sent as X-Admin-Token); unset disables them
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
 if not all([CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE]):
     raise RuntimeError(
         "Missing Chroma Cloud configuration: set CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE"
     )
 
-app = FastAPI(title="FurnishML API")
+
+def _log_warm_up_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.warning("Startup warm-up %s failed", task.get_name(), exc_info=task.exception())
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # Warm-ups run in threads without blocking startup: the Anthropic client
+    # opens its connection and CLIP loads, so the first complete-room request
+    # and the first search don't pay for either. Failures are only logged.
+    tasks = [
+        asyncio.create_task(asyncio.to_thread(warm_up_client), name="anthropic"),
+        asyncio.create_task(asyncio.to_thread(warm_up_clip), name="clip"),
+    ]
+    for task in tasks:
+        task.add_done_callback(_log_warm_up_failure)
+    app.state.warm_up_tasks = tasks
+    yield
+
+
+app = FastAPI(title="FurnishML API", lifespan=lifespan)
+
 
 allowed_origins = os.getenv("CORS_ALLOW_ORIGINS", "*").split(",")
 app.add_middleware(
@@ -80,6 +112,21 @@ products = client.get_or_create_collection("products", metadata={"hnsw:space": "
 
 openai_client = OpenAI()
 
+
+def _chroma_call(method: Any, **kwargs: Any) -> Any:
+    """Invoke a Chroma collection method, retrying connection errors, timeouts, 429 and 5xx."""
+    delay = 0.2
+    for attempt in range(1, CHROMA_RETRIES + 1):
+        try:
+            return method(**kwargs)
+        except Exception as exc:
+            if attempt == CHROMA_RETRIES or not is_transient_error(exc):
+                raise
+            logger.warning("Chroma call failed (attempt %s/%s): %s", attempt, CHROMA_RETRIES, exc)
+            time.sleep(delay)
+            delay *= 2
+
+
 GENERATED_ROOT.mkdir(parents=True, exist_ok=True)
 app.mount("/generated", StaticFiles(directory=str(GENERATED_ROOT), html=False), name="generated")
 
@@ -131,6 +178,12 @@ class Generate3DRequest(BaseModel):
     use_cached: bool = True
 
 
+class Generate3DBatchRequest(BaseModel):
+    """Every piece of a room, generated concurrently in one request."""
+
+    pieces: list[Generate3DRequest]
+
+
 class ImageTo3DRequest(BaseModel):
     """Request model for image-assisted furniture generation."""
 
@@ -461,7 +514,7 @@ def _cleanup_files(paths: List[Optional[Path]]) -> None:
 
 def _get_cached_taste_summary(user_id: str) -> tuple[Optional[dict[str, Any]], Optional[str]]:
     try:
-        user_res = users.get(ids=[user_id], include=["metadatas"])
+        user_res = _chroma_call(users.get, ids=[user_id], include=["metadatas"])
     except chromadb.errors.InvalidCollectionException:
         return None, None
 
@@ -673,15 +726,11 @@ async def render_room(
             raise HTTPException(status_code=404, detail="No product candidates available")
 
         system_prompt, user_payload = _build_claude_payload(user_id, user_vec, taste_summary, candidates)
-        loop = asyncio.get_running_loop()
-        claude_res = await loop.run_in_executor(
-            None,
-            lambda: recommend_products(
-                system_prompt=system_prompt,
-                user_content=user_payload,
-                model=ANTHROPIC_MODEL,
-                max_tokens=800,
-            ),
+        claude_res = await arecommend_products(
+            system_prompt=system_prompt,
+            user_content=user_payload,
+            model=ANTHROPIC_MODEL,
+            max_tokens=800,
         )
 
         parsed = claude_res.get("parsed") or {}
@@ -719,6 +768,7 @@ async def render_room(
                     prompt=prompt_text,
                 )
 
+        loop = asyncio.get_running_loop()
         openai_res = await loop.run_in_executor(None, _call_image_edit)
         try:
             image_b64 = openai_res.data[0].b64_json
@@ -737,14 +787,28 @@ async def render_room(
         _cleanup_files([room_path])
 
 
-@app.get("/artworks/list")
-def list_artworks() -> Dict[str, Any]:
+# Serialized /artworks/list body; the artwork catalog only changes when
+# embed_artworks.py is re-run, so it is built once and served as raw bytes.
+# Only a full listing is cached: an empty or peek() fallback result is served
+# but rebuilt on the next request.
+_artworks_payload: Optional[bytes] = None
+
+
+def _load_artwork_items() -> tuple[List[Dict[str, Any]], bool]:
+    """Return the artwork items and whether they came from a complete listing."""
+    complete = True
     try:
-        res = artworks.get(include=["metadatas"], limit=300)
+        res = _chroma_call(artworks.get, include=["metadatas"], limit=300)
         ids = res.get("ids", [])
         metas = res.get("metadatas", [])
-    except ValueError:
-        peek = artworks.peek(limit=300)
+    except Exception as exc:
+        logger.warning("artworks.get failed, falling back to peek: %s", exc)
+        complete = False
+        try:
+            peek = artworks.peek(limit=300)
+        except Exception as peek_exc:
+            logger.warning("artworks.peek failed: %s", peek_exc)
+            return [], False
         ids = peek.get("ids", [])
         metas = peek.get("metadatas", [])
 
@@ -762,13 +826,40 @@ def list_artworks() -> Dict[str, Any]:
         if isinstance(meta, dict):
             item.update(meta)
         items.append(item)
-    return {"items": items}
+    return items, complete and bool(items)
+
+
+def _require_admin(x_admin_token: Optional[str] = Header(default=None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled; set ADMIN_TOKEN")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.get("/artworks/list")
+def list_artworks() -> Response:
+    global _artworks_payload
+    if _artworks_payload is not None:
+        return Response(content=_artworks_payload, media_type="application/json")
+    items, cacheable = _load_artwork_items()
+    payload = json.dumps({"items": items}).encode("utf-8")
+    if cacheable:
+        _artworks_payload = payload
+    return Response(content=payload, media_type="application/json")
+
+
+@app.post("/artworks/refresh", dependencies=[Depends(_require_admin)])
+def refresh_artworks() -> Dict[str, Any]:
+    global _artworks_payload
+    items, cacheable = _load_artwork_items()
+    _artworks_payload = json.dumps({"items": items}).encode("utf-8") if cacheable else None
+    return {"ok": True, "count": len(items), "cached": cacheable}
 
 
 @app.post("/taste/update")
 def taste_update(payload: TasteUpdate) -> Dict[str, Any]:
     try:
-        current = users.get(ids=[payload.user_id], include=["embeddings"])
+        current = _chroma_call(users.get, ids=[payload.user_id], include=["embeddings"])
     except chromadb.errors.InvalidCollectionException:
         current = {"ids": [], "embeddings": []}
 
@@ -783,7 +874,8 @@ def taste_update(payload: TasteUpdate) -> Dict[str, Any]:
 
     user_vec: np.ndarray | None = embeddings[0] if embeddings else None
 
-    mood_res = artworks.get(
+    mood_res = _chroma_call(
+        artworks.get,
         ids=[payload.win_id] + ([payload.lose_id] if payload.lose_id else []),
         include=["embeddings"],
     )
@@ -813,11 +905,15 @@ def taste_update(payload: TasteUpdate) -> Dict[str, Any]:
     if norm > 0:
         user_vec = user_vec / norm
 
-    users.upsert(
+    # Chroma takes float32 ndarrays as-is; passing lists only adds a
+    # Python-float round-trip before it re-packs them.
+    _chroma_call(
+        users.upsert,
         ids=[payload.user_id],
-        embeddings=[user_vec.tolist()],
+        embeddings=[user_vec],
         metadatas=[{"updated_at": __import__("time").time()}],
     )
+    remember_user_preference_vector(client, payload.user_id, user_vec)
     return {"ok": True, "vector": user_vec.tolist()}
 
 
@@ -825,7 +921,7 @@ def taste_update(payload: TasteUpdate) -> Dict[str, Any]:
 def taste_summarize(payload: TasteSummaryRequest) -> Dict[str, Any]:
     top_k = max(1, min(payload.top_k, 24))
     try:
-        user_res = users.get(ids=[payload.user_id], include=["embeddings", "metadatas"])
+        user_res = _chroma_call(users.get, ids=[payload.user_id], include=["embeddings", "metadatas"])
     except chromadb.errors.InvalidCollectionException as exc:
         raise HTTPException(status_code=404, detail="User collection not initialized") from exc
 
@@ -836,8 +932,9 @@ def taste_summarize(payload: TasteSummaryRequest) -> Dict[str, Any]:
     user_vec = np.array(embeddings_raw[0], dtype="float32")
     vector_preview = user_vec[: max(0, payload.vector_preview)].tolist()
 
-    query = artworks.query(
-        query_embeddings=[user_vec.tolist()],
+    query = _chroma_call(
+        artworks.query,
+        query_embeddings=[user_vec],
         n_results=max(top_k, 6),
         include=["metadatas", "distances"],
     )
@@ -919,9 +1016,10 @@ def taste_summarize(payload: TasteSummaryRequest) -> Dict[str, Any]:
 
     # Store summary in user metadata for downstream recommendation context
     try:
-        users.upsert(
+        _chroma_call(
+            users.upsert,
             ids=[payload.user_id],
-            embeddings=[user_vec.tolist()],
+            embeddings=[user_vec],
             metadatas=[{"taste_summary": summary, "raw_taste_summary": raw_summary}],
         )
     except Exception:  # pragma: no cover
@@ -968,8 +1066,7 @@ def search_furniture(payload: FurnitureSearchRequest) -> Dict[str, Any]:
 @app.get("/api/furniture/{furniture_id}")
 def get_furniture_by_id(furniture_id: str) -> Dict[str, Any]:
     try:
-        service = FurnitureSearchService(client)
-        item = service.get_furniture_by_id(furniture_id)
+        item = get_furniture_service(client).get_furniture_by_id(furniture_id)
         if not item:
             raise HTTPException(status_code=404, detail="Furniture item not found")
         return item
@@ -996,6 +1093,24 @@ def generate_3d_model(payload: Generate3DRequest) -> Dict[str, Any]:
     )
 
 
+@app.post("/api/generate-3d/batch")
+async def generate_3d_batch(payload: Generate3DBatchRequest) -> Dict[str, Any]:
+    if len(payload.pieces) > MAX_BATCH_PIECES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PIECES} pieces per batch")
+    generator = Claude3DGenerator()
+    specs = [piece.model_dump(exclude={"use_cached"}) for piece in payload.pieces]
+    codes = await generator.agenerate_room_pieces(specs)
+    results = [
+        {
+            "code": code,
+            "source": "fallback" if code.startswith("// FALLBACK_CODE") else "claude",
+            "metadata": spec,
+        }
+        for spec, code in zip(specs, codes)
+    ]
+    return {"results": results}
+
+
 @app.post("/api/image-to-3d")
 def generate_3d_from_image(payload: ImageTo3DRequest) -> Dict[str, Any]:
     generator = Claude3DGenerator()
@@ -1101,7 +1216,7 @@ def recommend_products_endpoint(payload: ProductRecommendationRequest) -> Produc
 
 def _get_user_vector(user_id: str) -> np.ndarray:
     try:
-        user_res = users.get(ids=[user_id], include=["embeddings", "metadatas"])
+        user_res = _chroma_call(users.get, ids=[user_id], include=["embeddings", "metadatas"])
     except chromadb.errors.InvalidCollectionException as exc:
         raise HTTPException(status_code=404, detail="User collection not initialized") from exc
 
@@ -1114,8 +1229,9 @@ def _get_user_vector(user_id: str) -> np.ndarray:
 
 def _query_products_by_vector(user_vec: np.ndarray, candidate_pool: int) -> list[dict[str, Any]]:
     pool = max(candidate_pool, 1)
-    res = products.query(
-        query_embeddings=[user_vec.tolist()],
+    res = _chroma_call(
+        products.query,
+        query_embeddings=[user_vec],
         n_results=pool,
         include=["metadatas", "distances"],
     )
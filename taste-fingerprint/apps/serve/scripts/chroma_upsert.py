@@ -0,0 +1,85 @@
+"""Chroma collection sync (batched upserts, stale-id cleanup) shared by the embed_* ingest scripts."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Sequence
+
+from apps.serve.services.retry import is_transient_error
+
+UPSERT_BATCH_SIZE = 200
+UPSERT_RETRIES = 3
+STALE_SCAN_PAGE_SIZE = 300
+
+# Catalog collections hold a few hundred vectors; a sparse, shallow HNSW graph is
+# cheaper to build and hold, and a brute-force-sized search loses no recall.
+SMALL_COLLECTION_HNSW = {"hnsw:construction_ef": 64, "hnsw:M": 8, "hnsw:search_ef": 16}
+
+
+def open_collection(client: Any, name: str, *, index_params: dict[str, Any] | None = None) -> Any:
+    """Return the existing ``name`` collection, creating it with cosine distance if missing.
+
+    The collection is never dropped: the running API holds handles bound to its
+    id, and a delete/recreate would leave them pointing at a deleted collection.
+    ``index_params`` are extra ``hnsw:*`` settings, applied only on creation.
+    """
+    try:
+        return client.get_collection(name)
+    except Exception:
+        # Missing on a first run; anything else surfaces on the create below.
+        return client.create_collection(name, metadata={"hnsw:space": "cosine", **(index_params or {})})
+
+
+def delete_stale_ids(collection: Any, keep_ids: Sequence[str], *, page_size: int = STALE_SCAN_PAGE_SIZE) -> int:
+    """Delete every id in ``collection`` that is not in ``keep_ids``; returns the count.
+
+    Ids are listed page by page (Chroma Cloud caps ``get`` sizes) and only deleted
+    once the scan is done, so offsets stay valid while paging.
+    """
+    keep = set(keep_ids)
+    stale: list[str] = []
+    offset = 0
+    while True:
+        page = collection.get(include=[], limit=page_size, offset=offset)["ids"]
+        stale.extend(item_id for item_id in page if item_id not in keep)
+        if len(page) < page_size:
+            break
+        offset += page_size
+    for start in range(0, len(stale), page_size):
+        collection.delete(ids=stale[start : start + page_size])
+    return len(stale)
+
+
+def upsert_in_batches(
+    collection: Any,
+    *,
+    ids: Sequence[str],
+    embeddings: Sequence[Any],
+    metadatas: Sequence[dict[str, Any]],
+    batch_size: int = UPSERT_BATCH_SIZE,
+    retries: int = UPSERT_RETRIES,
+) -> None:
+    """Upsert in bounded batches, retrying transient failures with exponential backoff.
+
+    Upserts are idempotent on ID, so a retried or re-run batch never duplicates
+    items and earlier batches survive a failure later in the run.
+    """
+    total = len(ids)
+    for start in range(0, total, batch_size):
+        end = min(start + batch_size, total)
+        delay = 1.0
+        for attempt in range(1, retries + 1):
+            try:
+                collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=embeddings[start:end],
+                    metadatas=metadatas[start:end],
+                )
+                break
+            except Exception as exc:
+                if attempt == retries or not is_transient_error(exc):
+                    raise
+                print(f"  - Upsert of items {start}-{end} failed ({exc}); retrying in {delay:.0f}s")
+                time.sleep(delay)
+                delay *= 2
+        print(f"  - Upserted {end}/{total}")
@@ -22,14 +22,19 @@ import math
 import re
 from collections import Counter, defaultdict
 from dataclasses import dataclass
+from functools import lru_cache
+from multiprocessing import Pool
 from pathlib import Path
 from typing import Iterable, Optional
 
+import orjson
+
 
 # ---------------------------------------------------------------------------
 # Constants & heuristics
 # ---------------------------------------------------------------------------
 
+# Output schema; transform_item only ever assigns these keys.
 ALLOWED_FIELDS = {
     "id",
     "name",
@@ -114,12 +119,19 @@ UNIT_TO_INCH = {
 
 DESCRIPTION_MAX_CHARS = 420
 
+# Below this many raw items the process pool costs more than it saves.
+PARALLEL_MIN_ITEMS = 1000
+PARALLEL_CHUNKSIZE = 500
+
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
 
+# Titles and product-detail strings repeat heavily across SKUs, so
+# slugify and split_on_delimiters are memoised.
+@lru_cache(maxsize=65536)
 def slugify(value: str, max_len: int = 48) -> str:
     slug = re.sub(r"[^a-z0-9]+", "-", value.lower())
     slug = slug.strip("-")
@@ -151,9 +163,13 @@ def normalize_list(values: Iterable[str]) -> list[str]:
     return result
 
 
-def split_on_delimiters(text: str) -> list[str]:
-    parts = re.split(r"[,/;]|\band\b|\bor\b", text, flags=re.IGNORECASE)
-    return [p.strip() for p in parts if p.strip()]
+DELIMITER_RE = re.compile(r"[,/;]|\band\b|\bor\b", re.IGNORECASE)
+
+
+@lru_cache(maxsize=65536)
+def split_on_delimiters(text: str) -> tuple[str, ...]:
+    parts = DELIMITER_RE.split(text)
+    return tuple(p.strip() for p in parts if p.strip())
 
 
 def extract_detail(item: dict, *detail_keys: str) -> Optional[str]:
@@ -182,19 +198,34 @@ DIMENSION_RE = re.compile(
     re.IGNORECASE | re.VERBOSE,
 )
 
+DIMENSION_SEPARATOR_RE = re.compile(r"(?<![a-z])[x×*](?![a-z])", re.IGNORECASE)
+
 
 def parse_dimensions(text: str) -> Optional[dict[str, float]]:
     if not text:
         return None
 
-    text = text.replace("—", "-").replace("×", "x")
-    segments = re.split(r"\s*[x×]\s*", text)
+    # One scan over the whole string. A dimension is the first number after an
+    # x/×/* separator; numbers not separated that way (weights, counts, "(50 cm)"
+    # conversions) stay in the same segment, where a number carrying a unit or
+    # label beats a bare one.
+    segments: list[list[re.Match[str]]] = []
+    last_end: Optional[int] = None
+    for match in DIMENSION_RE.finditer(text):
+        if last_end is None or DIMENSION_SEPARATOR_RE.search(text[last_end : match.start()]):
+            if len(segments) == 3:
+                break
+            segments.append([])
+        segments[-1].append(match)
+        last_end = match.end()
+
+    if len(segments) < 3:
+        return None
+
     values = {"w": None, "d": None, "h": None}
 
     for segment in segments:
-        match = DIMENSION_RE.search(segment)
-        if not match:
-            continue
+        match = next((m for m in segment if m.group("unit") or m.group("label")), segment[0])
         raw_value = float(match.group("value"))
         unit = (match.group("unit") or '"').lower()
         label = (match.group("label") or "").lower()
@@ -392,11 +423,6 @@ def transform_item(raw: dict) -> TransformResult:
         if lighting_type:
             cleaned["lighting_type"] = lighting_type
 
-    # Ensure no unexpected fields leak through
-    for key in list(cleaned.keys()):
-        if key not in ALLOWED_FIELDS:
-            cleaned.pop(key)
-
     missing_required = [k for k in ("buy_url", "scraped_at") if not cleaned.get(k)]
     if missing_required:
         return TransformResult({}, f"missing_{'-'.join(missing_required)}")
@@ -411,24 +437,36 @@ def dedupe_key(entry: dict) -> str:
     return entry.get("image_url", "")
 
 
-def make_unique_id(base_id: str, seen: set[str]) -> str:
-    candidate = base_id
-    suffix = 2
-    while candidate in seen:
-        candidate = f"{base_id}-v{suffix:02d}"
-        suffix += 1
-    seen.add(candidate)
-    return candidate
+def make_unique_id(base_id: str, id_counts: Counter) -> str:
+    # Base IDs always end in "_v01", so a "-vNN" suffix can never collide
+    # with another base ID and a per-base counter is enough.
+    count = id_counts[base_id]
+    id_counts[base_id] += 1
+    return base_id if count == 0 else f"{base_id}-v{count + 1:02d}"
+
 
+def _transform_all(raw_items: list[dict], workers: Optional[int]) -> Iterable[TransformResult]:
+    if workers == 1 or len(raw_items) < PARALLEL_MIN_ITEMS:
+        return map(transform_item, raw_items)
+    with Pool(processes=workers) as pool:
+        # Ordered imap keeps dedupe and ID suffixes deterministic across runs.
+        return list(pool.imap(transform_item, raw_items, chunksize=PARALLEL_CHUNKSIZE))
 
-def clean_products(raw_items: list[dict]) -> tuple[list[dict], Counter]:
+
+def clean_products(
+    raw_items: list[dict],
+    *,
+    workers: Optional[int] = None,
+) -> tuple[list[dict], Counter]:
     cleaned: list[dict] = []
     rejects = Counter()
     seen_keys: set[str] = set()
-    seen_ids: set[str] = set()
+    id_counts: Counter = Counter()
 
-    for raw in raw_items:
-        result = transform_item(raw)
+    # transform_item is pure per item, so it fans out across processes;
+    # dedupe and ID uniquification stay sequential below.
+    results = _transform_all(raw_items, workers)
+    for raw, result in zip(raw_items, results):
         if result.reason:
             rejects[result.reason] += 1
             continue
@@ -439,15 +477,15 @@ def clean_products(raw_items: list[dict]) -> tuple[list[dict], Counter]:
         if key:
             seen_keys.add(key)
         item = dict(result.item)
-        item["id"] = make_unique_id(item["id"], seen_ids)
+        item["id"] = make_unique_id(item["id"], id_counts)
         cleaned.append(item)
 
     return cleaned, rejects
 
 
-def main(raw_path: Path, out_path: Path) -> None:
-    raw_items = json.loads(raw_path.read_text())
-    cleaned, rejects = clean_products(raw_items)
+def main(raw_path: Path, out_path: Path, workers: Optional[int] = None) -> None:
+    raw_items = orjson.loads(raw_path.read_bytes())
+    cleaned, rejects = clean_products(raw_items, workers=workers)
 
     out_path.write_text(json.dumps(cleaned, indent=2, sort_keys=False))
 
@@ -475,7 +513,13 @@ if __name__ == "__main__":
         default=Path("packages/catalog/products_clean.json"),
         help="Output path for cleaned catalog",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for the transform pass (default: CPU count, 1 disables)",
+    )
     args = parser.parse_args()
 
-    main(args.raw, args.out)
+    main(args.raw, args.out, args.workers)
 
@@ -22,11 +22,14 @@ import argparse
 import json
 import sys
 from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Iterable
 from urllib.parse import urlparse
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 
 
 ROOT_DIR = Path(__file__).resolve().parents[3]
@@ -68,21 +71,32 @@ def _infer_suffix(url: str) -> str:
     return ".jpg"
 
 
-def _iter_products(products_path: Path) -> Iterable[dict]:
-    payload = json.loads(products_path.read_text())
+def _load_products(products_path: Path) -> list[dict]:
+    payload = orjson.loads(products_path.read_bytes())
     if not isinstance(payload, list):
         raise ValueError(f"Expected a list in {products_path}, found {type(payload)}")
     return payload
 
 
+@lru_cache(maxsize=1)
+def _session() -> requests.Session:
+    # Catalog images mostly come from a handful of CDNs; a pooled session keeps
+    # those connections alive instead of a new TCP+TLS handshake per image.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32, max_retries=3)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
 def _download_image(url: str, dest: Path, *, timeout: float = 20.0) -> None:
-    response = requests.get(url, timeout=timeout)
+    response = _session().get(url, timeout=timeout)
     response.raise_for_status()
     dest.write_bytes(response.content)
 
 
 def download_all(
-    products_path: Path,
+    products: Iterable[dict],
     output_dir: Path,
     *,
     force: bool = False,
@@ -90,7 +104,7 @@ def download_all(
     output_dir.mkdir(parents=True, exist_ok=True)
     results: list[DownloadResult] = []
 
-    for entry in _iter_products(products_path):
+    for entry in products:
         product_id = entry.get("id") or "unknown"
         image_url = entry.get("image_url")
 
@@ -130,12 +144,10 @@ def download_all(
     return results
 
 
-def rewrite_image_urls(products_path: Path, mapping: dict[str, str]) -> int:
-    original = products_path.read_bytes()
-    data = json.loads(original)
+def rewrite_image_urls(products_path: Path, products: list[dict], mapping: dict[str, str]) -> int:
     changed = 0
 
-    for entry in data:
+    for entry in products:
         product_id = entry.get("id")
         if not product_id:
             continue
@@ -148,9 +160,7 @@ def rewrite_image_urls(products_path: Path, mapping: dict[str, str]) -> int:
             changed += 1
 
     if changed:
-        products_path.write_text(json.dumps(data, indent=2) + "\n")
-    else:
-        products_path.write_bytes(original)
+        products_path.write_text(json.dumps(products, indent=2) + "\n")
 
     return changed
 
@@ -182,7 +192,8 @@ def main() -> int:
 
     args = parser.parse_args()
 
-    results = download_all(args.products, args.out, force=args.force)
+    products = _load_products(args.products)
+    results = download_all(products, args.out, force=args.force)
 
     downloaded = sum(1 for r in results if not r.skipped and not r.error)
     skipped = sum(1 for r in results if r.skipped)
@@ -201,7 +212,7 @@ def main() -> int:
             for res in results
             if not res.error and res.dest.is_file()
         }
-        updated = rewrite_image_urls(args.products, mapping)
+        updated = rewrite_image_urls(args.products, products, mapping)
         print(f"Rewrote {updated} image_url values in {args.products}")
 
     return 1 if errors else 0
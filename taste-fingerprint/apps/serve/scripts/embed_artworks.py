@@ -1,11 +1,11 @@
 from __future__ import annotations
 
-import json
 import os
 import sys
 from pathlib import Path
 
 import chromadb
+import orjson
 from PIL import Image
 from dotenv import load_dotenv
 
@@ -13,6 +13,7 @@ ROOT_DIR = Path(__file__).resolve().parents[3]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
+from apps.serve.scripts.chroma_upsert import delete_stale_ids, open_collection, upsert_in_batches
 from apps.serve.services.embeddings import embed_image
 
 load_dotenv()
@@ -32,11 +33,10 @@ client = chromadb.CloudClient(
     tenant=CHROMA_TENANT,
     database=CHROMA_DATABASE,
 )
-collection = client.get_or_create_collection("artworks", metadata={"hnsw:space": "cosine"})
 
 
 def main() -> None:
-    data = json.loads(ARTWORKS_JSON.read_text())
+    data = orjson.loads(ARTWORKS_JSON.read_bytes())
     ids: list[str] = []
     embeddings: list[list[float]] = []
     metadatas: list[dict[str, str]] = []
@@ -61,16 +61,17 @@ def main() -> None:
         for key in ("style_tags", "palette_keywords", "material_inspirations", "mood_keywords"):
             value = entry.get(key)
             if value:
-                metadata[key] = json.dumps(value)
+                metadata[key] = orjson.dumps(value).decode()
 
         metadatas.append(metadata)
 
-    existing = collection.get(limit=300)
-    existing_ids = existing.get("ids") or []
-    if existing_ids:
-        collection.delete(ids=existing_ids)
+    collection = open_collection(client, "artworks")
 
-    collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas)
+    # Vectors stay float32: Chroma's HNSW index stores float32 regardless of the
+    # dtype sent, so fp16/int8 here would only lose precision, not memory.
+    upsert_in_batches(collection, ids=ids, embeddings=embeddings, metadatas=metadatas)
+    removed = delete_stale_ids(collection, ids)
+    print(f"Removed {removed} artworks no longer in the catalog.")
     print(f"Embedded {len(ids)} artworks into Chroma Cloud database '{CHROMA_DATABASE}'.")
 
 
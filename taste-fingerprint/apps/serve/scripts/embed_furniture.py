@@ -5,20 +5,27 @@ Embed furniture catalog items into ChromaDB using CLIP image embeddings.
 Run this script to populate the 'furnitures' collection with searchable items.
 """
 
-import json
 import os
 import sys
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
 import chromadb
-from PIL import Image
+import numpy as np
+import orjson
 from dotenv import load_dotenv
 
 ROOT_DIR = Path(__file__).resolve().parents[3]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-from apps.serve.services.embeddings import embed_image, embed_text
+from apps.serve.scripts.chroma_upsert import (
+    SMALL_COLLECTION_HNSW,
+    delete_stale_ids,
+    open_collection,
+    upsert_in_batches,
+)
+from apps.serve.scripts.embedding_cache import embed_image_sources_cached
+from apps.serve.services.embeddings import embed_texts, open_image_rgb
 
 load_dotenv()
 
@@ -31,6 +38,7 @@ if not all([CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE]):
 
 FURNITURE_JSON = ROOT_DIR / "packages/catalog/furniture.json"
 PUBLIC_ROOT = ROOT_DIR / "apps/web/public"
+EMBED_BATCH_SIZE = 32
 
 client = chromadb.CloudClient(
     api_key=CHROMA_API_KEY,
@@ -38,9 +46,6 @@ client = chromadb.CloudClient(
     database=CHROMA_DATABASE,
 )
 
-# Create furniture collection with cosine similarity
-collection = client.get_or_create_collection("furnitures", metadata={"hnsw:space": "cosine"})
-
 
 def generate_text_description(item: dict) -> str:
     """Generate a rich text description for text embedding."""
@@ -55,30 +60,45 @@ def generate_text_description(item: dict) -> str:
     return " ".join(filter(None, parts))
 
 
+def _existing_image_keys(keys: set[PurePosixPath]) -> set[PurePosixPath]:
+    """Which of ``keys`` (paths under PUBLIC_ROOT) exist, via one scandir per directory."""
+    available: set[PurePosixPath] = set()
+    for parent in {key.parent for key in keys}:
+        try:
+            with os.scandir(PUBLIC_ROOT / parent) as entries:
+                available.update(parent / entry.name for entry in entries if entry.is_file())
+        except FileNotFoundError:
+            continue
+    return available
+
+
 def main() -> None:
     print(f"Loading furniture catalog from {FURNITURE_JSON}")
-    data = json.loads(FURNITURE_JSON.read_text())
+    data = orjson.loads(FURNITURE_JSON.read_bytes())
     
     ids: list[str] = []
-    embeddings: list[list[float]] = []
     metadatas: list[dict] = []
+    image_jobs: list[tuple[int, Path]] = []
+    text_jobs: list[tuple[int, str]] = []
 
-    for entry in data:
+    image_keys = [PurePosixPath(entry["image_url"].lstrip("/")) for entry in data]
+    available = _existing_image_keys(set(image_keys))
+
+    for index, (entry, image_key) in enumerate(zip(data, image_keys)):
         item_id = entry["id"]
         print(f"Processing {item_id}...")
         
         # Try to load image for embedding, fall back to text description
-        img_path = PUBLIC_ROOT / entry["image_url"].lstrip("/")
+        img_path = PUBLIC_ROOT / image_key
         
-        if img_path.exists():
+        if image_key in available:
+            # Image embeddings are computed in batches below
             print(f"  - Using image embedding from {img_path.name}")
-            with Image.open(img_path).convert("RGB") as img:
-                vec = embed_image(img)
+            image_jobs.append((index, img_path))
         else:
             # Fallback: use text embedding
             print(f"  - Image not found, using text embedding")
-            text_desc = generate_text_description(entry)
-            vec = embed_text(text_desc)
+            text_jobs.append((index, generate_text_description(entry)))
         
         # Prepare metadata (ChromaDB supports string, int, float, bool)
         metadata = {
@@ -95,28 +115,40 @@ def main() -> None:
             "height": float(entry.get("dimensions", {}).get("height", 0)),
             "unit": entry.get("dimensions", {}).get("unit", "inches"),
             # Store arrays as JSON strings (ChromaDB limitation)
-            "styleTags": json.dumps(entry.get("styleTags", [])),
-            "colors": json.dumps(entry.get("colors", []))
+            "styleTags": orjson.dumps(entry.get("styleTags", [])).decode(),
+            "colors": orjson.dumps(entry.get("colors", [])).decode()
         }
         
         ids.append(item_id)
-        embeddings.append(vec.tolist())
         metadatas.append(metadata)
+
+    print(f"\nEmbedding {len(image_jobs)} images in batches of {EMBED_BATCH_SIZE}...")
+    image_vectors = embed_image_sources_cached(
+        [img_path for _, img_path in image_jobs],
+        open_image_rgb,
+        Path,
+        batch_size=EMBED_BATCH_SIZE,
+    )
+
+    # Rows are written straight into one float32 matrix that goes to Chroma
+    # as-is, instead of building a Python list of floats per vector.
+    embeddings = np.empty((len(data), image_vectors.shape[1]), dtype=np.float32)
+    embeddings[[index for index, _ in image_jobs]] = image_vectors
+    if text_jobs:
+        # Fallback descriptions go through the text tower as one batched group too
+        embeddings[[index for index, _ in text_jobs]] = embed_texts(
+            [text_desc for _, text_desc in text_jobs],
+            batch_size=EMBED_BATCH_SIZE,
+        )
     
-    # Clear existing data and insert new (respecting ChromaDB quota limits)
-    print(f"\nClearing existing furniture collection...")
-    try:
-        existing = collection.get(limit=300)  # ChromaDB free tier limit
-        existing_ids = existing.get("ids") or []
-        if existing_ids:
-            collection.delete(ids=existing_ids)
-            print(f"  - Deleted {len(existing_ids)} existing items")
-    except Exception as e:
-        print(f"  - Could not clear collection: {e}")
-        print(f"  - Will upsert anyway (will overwrite existing items with same IDs)")
+    collection = open_collection(client, "furnitures", index_params=SMALL_COLLECTION_HNSW)
     
     print(f"\nUpserting {len(ids)} furniture items to ChromaDB...")
-    collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas)
+    upsert_in_batches(collection, ids=ids, embeddings=embeddings, metadatas=metadatas)
+    
+    # Then drop items that left the catalog, keeping the collection (and its id) intact
+    removed = delete_stale_ids(collection, ids)
+    print(f"  - Removed {removed} stale furniture items")
     
     print(f"✓ Successfully embedded {len(ids)} furniture items into '{CHROMA_DATABASE}.furnitures' collection")
     print(f"\nCollection stats:")
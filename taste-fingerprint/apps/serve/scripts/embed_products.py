@@ -7,23 +7,26 @@ Images are cached on disk to avoid repeated downloads across runs.
 from __future__ import annotations
 
 import hashlib
-import json
 import os
 import sys
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Any
 
 import chromadb
+import orjson
 import requests
 from PIL import Image
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 ROOT_DIR = Path(__file__).resolve().parents[3]
 if str(ROOT_DIR) not in sys.path:
     sys.path.append(str(ROOT_DIR))
 
-from apps.serve.services.embeddings import embed_image
+from apps.serve.scripts.chroma_upsert import delete_stale_ids, open_collection, upsert_in_batches
+from apps.serve.scripts.embedding_cache import embed_image_sources_cached
+from apps.serve.services.embeddings import open_image_rgb
 
 load_dotenv()
 
@@ -39,6 +42,9 @@ if not all([CHROMA_API_KEY, CHROMA_TENANT, CHROMA_DATABASE]):
 PRODUCTS_JSON = ROOT_DIR / "packages/catalog/products_unique.json"
 PUBLIC_DIR = ROOT_DIR / "apps/web/public"
 CACHE_DIR = ROOT_DIR / "apps/serve/.cache/product_images"
+EMBED_BATCH_SIZE = 32
+DOWNLOAD_WORKERS = 16
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
 CACHE_DIR.mkdir(parents=True, exist_ok=True)
 
 client = chromadb.CloudClient(
@@ -46,7 +52,10 @@ client = chromadb.CloudClient(
     tenant=CHROMA_TENANT,
     database=CHROMA_DATABASE,
 )
-collection = client.get_or_create_collection("products", metadata={"hnsw:space": "cosine"})
+
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=DOWNLOAD_WORKERS, pool_maxsize=DOWNLOAD_WORKERS))
+session.mount("http://", HTTPAdapter(pool_connections=DOWNLOAD_WORKERS, pool_maxsize=DOWNLOAD_WORKERS))
 
 
 def _cache_path(url: str) -> Path:
@@ -54,29 +63,65 @@ def _cache_path(url: str) -> Path:
     return CACHE_DIR / f"{digest}.bin"
 
 
-def _load_image(url: str, timeout: float = 10.0) -> Image.Image:
+def _download_to_cache(url: str, timeout: float = 10.0) -> Path:
+    cache_file = _cache_path(url)
+    tmp_file = cache_file.with_suffix(".tmp")
+    try:
+        with session.get(url, stream=True, timeout=timeout) as resp:
+            resp.raise_for_status()
+            with tmp_file.open("wb") as fh:
+                for chunk in resp.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    fh.write(chunk)
+    except BaseException:
+        tmp_file.unlink(missing_ok=True)
+        raise
+    # Atomic rename so an interrupted download never leaves a truncated cache entry.
+    tmp_file.replace(cache_file)
+    return cache_file
+
+
+def _prefetch_images(urls: list[str]) -> None:
+    """Warm the disk cache for remote images concurrently before embedding."""
+    missing = [
+        url
+        for url in dict.fromkeys(urls)
+        if requests.utils.urlparse(url).scheme in ("http", "https") and not _cache_path(url).exists()
+    ]
+    if not missing:
+        return
+    print(f"Prefetching {len(missing)} remote images with {DOWNLOAD_WORKERS} workers...")
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as executor:
+        futures = {executor.submit(_download_to_cache, url): url for url in missing}
+        for future in as_completed(futures):
+            exc = future.exception()
+            if exc is not None:
+                # _load_image retries and surfaces the error for this entry.
+                print(f"  - Prefetch failed for {futures[future]}: {exc}")
+
+
+def _image_path(url: str, timeout: float = 10.0) -> Path:
+    """Local file holding the image bytes, downloading remote URLs into the cache."""
     parsed = requests.utils.urlparse(url)
 
     if parsed.scheme in ("http", "https"):
         cache_file = _cache_path(url)
-        if cache_file.exists():
-            data = cache_file.read_bytes()
-        else:
-            resp = requests.get(url, timeout=timeout)
-            resp.raise_for_status()
-            data = resp.content
-            cache_file.write_bytes(data)
-        return Image.open(BytesIO(data)).convert("RGB")
+        if not cache_file.exists():
+            _download_to_cache(url, timeout=timeout)
+        return cache_file
 
     if not parsed.scheme and url.startswith("/"):
         local_path = PUBLIC_DIR / url.lstrip("/")
         if not local_path.exists():
             raise FileNotFoundError(f"Local image not found: {local_path}")
-        return Image.open(local_path).convert("RGB")
+        return local_path
 
     raise ValueError(f"Unsupported image URL: {url}")
 
 
+def _load_image(url: str) -> Image.Image:
+    return open_image_rgb(_image_path(url))
+
+
 def _prepare_metadata(entry: dict[str, Any]) -> dict[str, str]:
     metadata: dict[str, str] = {
         "name": entry.get("name", ""),
@@ -93,7 +138,7 @@ def _prepare_metadata(entry: dict[str, Any]) -> dict[str, str]:
     for key in ("materials", "colors", "style_tags", "roomTypes"):
         value = entry.get(key)
         if value:
-            metadata[key] = json.dumps(value)
+            metadata[key] = orjson.dumps(value).decode()
 
     lighting_type = entry.get("lighting_type")
     if lighting_type:
@@ -103,30 +148,31 @@ def _prepare_metadata(entry: dict[str, Any]) -> dict[str, str]:
 
 
 def main() -> None:
-    data = json.loads(PRODUCTS_JSON.read_text())
-
-    ids: list[str] = []
-    embeddings: list[list[float]] = []
-    metadatas: list[dict[str, str]] = []
+    data = orjson.loads(PRODUCTS_JSON.read_bytes())
 
     for entry in data:
-        image_url = entry.get("image_url")
-        if not image_url:
+        if not entry.get("image_url"):
             raise ValueError(f"Entry {entry.get('id')} missing image_url")
 
-        image = _load_image(image_url)
-        vec = embed_image(image)
+    _prefetch_images([entry["image_url"] for entry in data])
 
-        ids.append(entry["id"])
-        embeddings.append(vec.tolist())
-        metadatas.append(_prepare_metadata(entry))
+    # DataLoader workers decode and preprocess upcoming batches while CLIP runs;
+    # images whose bytes were embedded on a previous run are served from disk.
+    # The (N, D) float32 matrix is upserted as-is, without per-vector .tolist().
+    embeddings = embed_image_sources_cached(
+        [entry["image_url"] for entry in data],
+        _load_image,
+        _image_path,
+        batch_size=EMBED_BATCH_SIZE,
+    )
+    ids = [entry["id"] for entry in data]
+    metadatas = [_prepare_metadata(entry) for entry in data]
 
-    existing = collection.get(limit=300)
-    existing_ids = existing.get("ids") or []
-    if existing_ids:
-        collection.delete(ids=existing_ids)
+    collection = open_collection(client, "products")
 
-    collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas)
+    upsert_in_batches(collection, ids=ids, embeddings=embeddings, metadatas=metadatas)
+    removed = delete_stale_ids(collection, ids)
+    print(f"Removed {removed} products no longer in the catalog.")
     print(f"Embedded {len(ids)} products into Chroma Cloud database '{CHROMA_DATABASE}'.")
 
 
@@ -0,0 +1,68 @@
+"""On-disk CLIP vector cache keyed by image content, shared by the embed_* scripts."""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+import numpy as np
+from PIL import Image
+
+from apps.serve.services.embeddings import DEVICE, QUANTIZE_MODEL, USE_ONNX, embed_image_sources
+
+VECTOR_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache/clip_vectors"
+MODEL_NAME = "openai/clip-vit-base-patch32"
+HASH_CHUNK_SIZE = 1024 * 1024
+# Everything that changes the vectors CLIP produces for the same bytes: the
+# checkpoint, the device/dtype it runs in, int8 quantization and the ONNX path.
+EMBEDDING_CONFIG = "|".join(
+    (
+        MODEL_NAME,
+        DEVICE.type,
+        "bfloat16" if DEVICE.type == "cuda" else "float32",
+        f"quantize={int(QUANTIZE_MODEL and DEVICE.type == 'cpu')}",
+        f"onnx={int(USE_ONNX)}",
+    )
+)
+
+
+def _content_key(path: Path) -> str:
+    # The embedding config is part of the key so switching model or runtime never serves stale vectors.
+    digest = hashlib.sha256(EMBEDDING_CONFIG.encode("utf-8"))
+    with path.open("rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def embed_image_sources_cached(
+    sources: Sequence[Any],
+    loader: Callable[[Any], Image.Image],
+    path_for: Callable[[Any], Path],
+    *,
+    batch_size: int = 32,
+) -> np.ndarray:
+    """Like ``embed_image_sources`` but only runs CLIP on images not embedded before.
+
+    ``path_for`` maps a source to the local file holding its bytes; vectors are
+    stored as ``{sha256(config + bytes)}.npy`` so unchanged images are skipped on re-runs.
+    """
+    VECTOR_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    cache_files = [VECTOR_CACHE_DIR / f"{_content_key(path_for(source))}.npy" for source in sources]
+    missing = [index for index, cache_file in enumerate(cache_files) if not cache_file.exists()]
+    print(f"Reusing {len(sources) - len(missing)} cached vectors; embedding {len(missing)} images")
+
+    vectors: list[np.ndarray | None] = [None] * len(sources)
+    if missing:
+        fresh = embed_image_sources([sources[index] for index in missing], loader, batch_size=batch_size)
+        for index, vec in zip(missing, fresh):
+            np.save(cache_files[index], vec)
+            vectors[index] = vec
+    for index, cache_file in enumerate(cache_files):
+        if vectors[index] is None:
+            vectors[index] = np.load(cache_file)
+
+    if not vectors:
+        return embed_image_sources([], loader, batch_size=batch_size)
+    return np.stack(vectors).astype(np.float32, copy=False)
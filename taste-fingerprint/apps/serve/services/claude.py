@@ -2,67 +2,111 @@ from __future__ import annotations
 
 """Anthropic Claude client helpers for taste vector summarization."""
 
-import json
+import importlib.util
 import logging
 import os
+import re
 from functools import lru_cache
 from typing import Any, Dict
 
-from anthropic import Anthropic
+import httpx
+import orjson
+from anthropic import Anthropic, AsyncAnthropic
 
 
 logger = logging.getLogger(__name__)
 
 
+# Opening ```lang line and any run of closing fence lines, removed in one pass.
+_FENCE_RE = re.compile(r"\A```[^\n]*\n?|(?:^[ \t]*```[^\n]*(?:\n|\Z))+\Z", re.M)
+
+
 class ClaudeSettingsError(RuntimeError):
     """Raised when Anthropic configuration is missing."""
 
 
+def _strip_code_fence(text: str) -> str:
+    """Unwrap a response Claude returned inside a Markdown code fence."""
+    if not text.startswith("```"):
+        return text
+    return _FENCE_RE.sub("", text).strip()
+
+
+def _join_text_blocks(content: Any) -> str:
+    return "".join(getattr(block, "text", "") for block in content if getattr(block, "type", None) == "text").strip()
+
+
+def _base_payload(response: Any) -> Dict[str, Any]:
+    usage_payload = response.usage.model_dump() if hasattr(response.usage, "model_dump") else response.usage
+    return {"id": response.id, "usage": usage_payload}
+
+
 @lru_cache(maxsize=1)
 def _client() -> Anthropic:
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         raise ClaudeSettingsError("Missing ANTHROPIC_API_KEY environment variable")
-    return Anthropic(api_key=api_key)
+    # One pooled client shared by every helper keeps connections warm between
+    # bursts; HTTP/2 is used when the optional ``h2`` package is installed.
+    # Pool settings live on the transport because httpx ignores Client-level
+    # ones once an explicit transport is passed.
+    transport = httpx.HTTPTransport(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+        retries=2,
+    )
+    http_client = httpx.Client(timeout=60.0, transport=transport)
+    return Anthropic(api_key=api_key, http_client=http_client)
 
 
+@lru_cache(maxsize=1)
+def _async_client() -> AsyncAnthropic:
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ClaudeSettingsError("Missing ANTHROPIC_API_KEY environment variable")
+    transport = httpx.AsyncHTTPTransport(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+        retries=2,
+    )
+    http_client = httpx.AsyncClient(timeout=60.0, transport=transport)
+    return AsyncAnthropic(api_key=api_key, http_client=http_client)
+
 
 def summarize_taste(prompt: str, *, model: str, max_tokens: int = 1_024) -> Dict[str, Any]:
     """Call Claude with JSON instructions and return parsed content."""
 
-    client = _client()
-    response = client.messages.create(
-        model=model,
-        max_tokens=max_tokens,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.2,
-    )
+    response = _client().messages.create(**_summary_request(prompt, model=model, max_tokens=max_tokens))
+    return _summary_result(response)
 
-    usage_payload = response.usage.model_dump() if hasattr(response.usage, "model_dump") else response.usage
-    data: Dict[str, Any] = {
-        "id": response.id,
-        "usage": usage_payload,
+
+async def asummarize_taste(prompt: str, *, model: str, max_tokens: int = 1_024) -> Dict[str, Any]:
+    """Async, streamed variant of :func:`summarize_taste` for use with ``asyncio.gather``."""
+
+    request = _summary_request(prompt, model=model, max_tokens=max_tokens)
+    async with _async_client().messages.stream(**request) as stream:
+        response = await stream.get_final_message()
+    return _summary_result(response)
+
+
+def _summary_request(prompt: str, *, model: str, max_tokens: int) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "max_tokens": max_tokens,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.2,
     }
 
-    text_blocks = []
-    for block in response.content:
-        if getattr(block, "type", None) == "text":
-            text_blocks.append(getattr(block, "text", ""))
-
-    combined_text = "".join(text_blocks).strip()
-    if combined_text.startswith("```"):
-        fence_lines = combined_text.splitlines()
-        if fence_lines and fence_lines[0].strip().startswith("```"):
-            fence_lines = fence_lines[1:]
-        if fence_lines and fence_lines[-1].strip().startswith("```"):
-            fence_lines = fence_lines[:-1]
-        combined_text = "\n".join(fence_lines).strip()
+
+def _summary_result(response: Any) -> Dict[str, Any]:
+    data = _base_payload(response)
+    combined_text = _strip_code_fence(_join_text_blocks(response.content))
     data["raw_text"] = combined_text
     if combined_text:
         logger.warning("Claude raw text for taste summary: %s", combined_text)
         try:
-            data["parsed"] = json.loads(combined_text)
-        except json.JSONDecodeError:
+            data["parsed"] = orjson.loads(combined_text)
+        except orjson.JSONDecodeError:
             data["parsed"] = None
             logger.warning("Claude response was not valid JSON; delivering raw text")
     else:
@@ -80,39 +124,63 @@ def recommend_products(
     max_tokens: int = 1_024,
     temperature: float = 0.3,
 ) -> Dict[str, Any]:
-    client = _client()
-    response = client.messages.create(
+    request = _recommend_request(
+        system_prompt=system_prompt,
+        user_content=user_content,
         model=model,
         max_tokens=max_tokens,
-        system=system_prompt,
-        messages=[{"role": "user", "content": user_content}],
         temperature=temperature,
     )
+    return _recommend_result(_client().messages.create(**request))
 
-    usage_payload = response.usage.model_dump() if hasattr(response.usage, "model_dump") else response.usage
-    data: Dict[str, Any] = {
-        "id": response.id,
-        "usage": usage_payload,
+
+async def arecommend_products(
+    *,
+    system_prompt: str,
+    user_content: str,
+    model: str,
+    max_tokens: int = 1_024,
+    temperature: float = 0.3,
+) -> Dict[str, Any]:
+    """Async, streamed variant of :func:`recommend_products` for use with ``asyncio.gather``."""
+
+    request = _recommend_request(
+        system_prompt=system_prompt,
+        user_content=user_content,
+        model=model,
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+    async with _async_client().messages.stream(**request) as stream:
+        response = await stream.get_final_message()
+    return _recommend_result(response)
+
+
+def _recommend_request(
+    *,
+    system_prompt: str,
+    user_content: str,
+    model: str,
+    max_tokens: int,
+    temperature: float,
+) -> Dict[str, Any]:
+    return {
+        "model": model,
+        "max_tokens": max_tokens,
+        "system": system_prompt,
+        "messages": [{"role": "user", "content": user_content}],
+        "temperature": temperature,
     }
 
-    text_blocks = []
-    for block in response.content:
-        if getattr(block, "type", None) == "text":
-            text_blocks.append(getattr(block, "text", ""))
-
-    combined_text = "".join(text_blocks).strip()
-    if combined_text.startswith("```"):
-        fence_lines = combined_text.splitlines()
-        if fence_lines:
-            fence_lines = fence_lines[1:]
-        while fence_lines and fence_lines[-1].strip().startswith("```"):
-            fence_lines.pop()
-        combined_text = "\n".join(fence_lines).strip()
+
+def _recommend_result(response: Any) -> Dict[str, Any]:
+    data = _base_payload(response)
+    combined_text = _strip_code_fence(_join_text_blocks(response.content))
     data["raw_text"] = combined_text
     if combined_text:
         try:
-            data["parsed"] = json.loads(combined_text)
-        except json.JSONDecodeError:
+            data["parsed"] = orjson.loads(combined_text)
+        except orjson.JSONDecodeError:
             data["parsed"] = None
             logger.warning("Claude recommendation response not valid JSON: %s", combined_text)
     else:
@@ -137,27 +205,10 @@ def craft_room_edit_prompt(context: Dict[str, Any], *, model: str, max_tokens: i
             "'prompt' whose value is the prompt string. The prompt should reference the furniture, "
             "materials, palette, and styling cues explicitly. Keep it under 120 words."
         ),
-        messages=[{"role": "user", "content": json.dumps(context, indent=2)}],
+        messages=[{"role": "user", "content": orjson.dumps(context, option=orjson.OPT_INDENT_2).decode()}],
     )
 
-    text_blocks = []
-    for block in response.content:
-        if getattr(block, "type", None) == "text":
-            text_blocks.append(getattr(block, "text", ""))
-
-    combined_text = "".join(text_blocks).strip()
-
-    def _strip_fence(text: str) -> str:
-        if not text.startswith("```"):
-            return text
-        fence_lines = text.splitlines()
-        if fence_lines and fence_lines[0].strip().startswith("```"):
-            fence_lines = fence_lines[1:]
-        while fence_lines and fence_lines[-1].strip().startswith("```"):
-            fence_lines.pop()
-        return "\n".join(fence_lines).strip()
-
-    combined_text = _strip_fence(combined_text)
+    combined_text = _strip_code_fence(_join_text_blocks(response.content))
 
     result: Dict[str, Any] = {"raw_text": combined_text}
     if not combined_text:
@@ -166,8 +217,8 @@ def craft_room_edit_prompt(context: Dict[str, Any], *, model: str, max_tokens: i
         return result
 
     try:
-        parsed = json.loads(combined_text)
-    except json.JSONDecodeError:
+        parsed = orjson.loads(combined_text)
+    except orjson.JSONDecodeError:
         logger.warning("Claude prompt response not valid JSON: %s", combined_text)
         result["prompt"] = combined_text
         return result
@@ -183,7 +234,9 @@ def craft_room_edit_prompt(context: Dict[str, Any], *, model: str, max_tokens: i
 
 __all__ = [
     "summarize_taste",
+    "asummarize_taste",
     "recommend_products",
+    "arecommend_products",
     "ClaudeSettingsError",
 ]
 
@@ -5,216 +5,95 @@ Generates Three.js code for furniture using Claude's latest model.
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import importlib
 import logging
 import os
+import re
+import sqlite3
+import sys
+import threading
+from functools import lru_cache
+from pathlib import Path
+from types import MappingProxyType
 from typing import Any, Dict, Iterable, Optional
 
 AnthropicClient = Any
 
 logger = logging.getLogger(__name__)
 
+_CODE_FENCE = re.compile(r"```(?:javascript|js)?\n?(.*?)```", re.DOTALL)
 
-class Claude3DGenerator:
-    """Service for generating 3D furniture models using Claude Sonnet 4.5."""
-
-    def __init__(self, api_key: Optional[str] = None) -> None:
-        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
-        if not self.api_key:
-            raise ValueError("Anthropic API key is required")
-
-        self.model_id = "claude-sonnet-4-5"
-        self.client: Optional[AnthropicClient] = None
-
-        if self.api_key == "dummy":
-            logger.info("Anthropic client disabled (dummy key); using fallback furniture code")
-            return
-
-        try:
-            module = importlib.import_module("anthropic")
-            client_factory = getattr(module, "Anthropic")
-            self.client = client_factory(api_key=self.api_key)
-        except ModuleNotFoundError:
-            logger.warning("anthropic package not installed; falling back to static models")
-        except Exception as exc:  # pragma: no cover - network dependency
-            logger.warning("Failed to initialise Anthropic client: %s", exc)
-
-    def generate_furniture_code(
-        self,
-        furniture_type: str,
-        style: str,
-        colors: Iterable[str],
-        materials: Iterable[str],
-        dimensions: Optional[Dict[str, float]] = None,
-        max_tokens: int = 2800,
-    ) -> str:
-        """Generate Three.js code for a furniture item via Claude or fallback."""
-
-        prompt = self._build_prompt(
-            furniture_type=furniture_type,
-            style=style,
-            colors=list(colors),
-            materials=list(materials),
-            dimensions=dimensions or {},
-        )
-
-        if not self.client:
-            logger.debug("Anthropic client missing; returning fallback code for %s", furniture_type)
-            return self._get_fallback_code(furniture_type)
-
-        try:
-            response = self.client.messages.create(
-                model=self.model_id,
-                max_tokens=max_tokens,
-                temperature=0.6,
-                messages=[{"role": "user", "content": prompt}],
-            )
-
-            generated_text = response.content[0].text if response.content else ""
-            code = self._extract_code(generated_text)
-
-            if not code.strip():  # pragma: no cover - defensive guard
-                raise ValueError("Claude returned an empty response")
-
-            logger.info("Successfully generated 3D code for %s", furniture_type)
-            return code
-
-        except Exception as exc:  # pragma: no cover - network dependency
-            logger.error("Failed to generate 3D code via Claude: %s", exc)
-            return self._get_fallback_code(furniture_type)
-
-    # ------------------------------------------------------------------
-    # Prompt construction helpers
-
-    def _build_prompt(
-        self,
-        furniture_type: str,
-        style: str,
-        colors: list[str],
-        materials: list[str],
-        dimensions: Dict[str, float],
-    ) -> str:
-        color_text = ", ".join(colors) if colors else "neutral palette"
-        material_text = ", ".join(materials) if materials else "wood"
-        dimension_text = self._format_dimensions(dimensions)
-        shininess = self._get_material_shininess(materials)
-
-        requirements = self._get_furniture_specific_requirements(furniture_type)
-
-        return f"""You are an expert Three.js developer.
-Design a {style} {furniture_type} that matches this specification and output only executable JavaScript.
-
-STRICT OUTPUT RULES:
-1. Return a function named `createFurniture` that returns a `THREE.Group`.
-2. Use only core Three.js primitives and materials. Do not load external assets or textures.
-3. Materials should use `THREE.MeshPhongMaterial` with shininess around {shininess}.
-4. Set realistic positions, scales, and rotations. Ensure the object is centred around the origin.
-5. Add small lighting helpers like `THREE.PointLight` when appropriate.
-6. Include comments explaining the major sections of the model.
-
-Visual palette: {color_text}
-Primary materials: {material_text}
-{dimension_text}
-
-Functional requirements:
-{requirements}
-
-Return only the JavaScript function body – no Markdown, explanations, or backticks.
-"""
-
-    @staticmethod
-    def _format_dimensions(dimensions: Dict[str, float]) -> str:
-        if not dimensions:
-            return "Approximate furniture size: standard proportions for the chosen type."
-
-        parts = []
-        for key in ("width", "depth", "height"):
-            if key in dimensions:
-                parts.append(f"{key}: {dimensions[key]:.2f}m")
-        return "Approximate dimensions: " + ", ".join(parts)
-
-    def _get_furniture_specific_requirements(self, furniture_type: str) -> str:
-        requirements = {
-            "bed": """
+FURNITURE_REQUIREMENTS = MappingProxyType({
+    "bed": """
 - Create a bed frame with headboard
 - Add a mattress and pillows on top of the frame
 - Headboard should be taller and decorative
 - Frame should be raised off the ground with legs""",
-            "nightstand": """
+    "nightstand": """
 - Small bedside table with 1-2 drawers
 - Include a flat top surface for a lamp or books
 - Height should align with a typical bed""",
-            "sofa": """
+    "sofa": """
 - Include seat cushions, back cushions, and armrests
 - Seat should be lower than the backrest
 - Add visible legs or a base platform""",
-            "chair": """
+    "chair": """
 - Include seat, backrest, and four legs
 - Slight backward angle on the backrest for comfort
 - Optional armrests depending on style""",
-            "table": """
+    "table": """
 - Flat tabletop with supporting legs or pedestal
 - Ensure the tabletop has some thickness
 - Legs should be spaced realistically for stability""",
-            "lamp": """
+    "lamp": """
 - Include base, pole/stand, and lampshade
 - Place a `THREE.PointLight` inside the shade
 - Use semi-transparent material for the shade""",
-            "dresser": """
+    "dresser": """
 - Multiple drawers stacked vertically
 - Add drawer handles or knobs
 - Optionally include a top surface for decor""",
-            "painting": """
+    "painting": """
 - Thin frame surrounding a flat canvas
 - Use a very shallow depth
 - Designed to hang on a wall""",
-        }
-        return requirements.get(
-            furniture_type.lower(),
-            "Create realistic proportions and include stylistic details appropriate for this furniture type.",
-        )
+})
+DEFAULT_REQUIREMENTS = "Create realistic proportions and include stylistic details appropriate for this furniture type."
 
-    @staticmethod
-    def _get_material_shininess(materials: Iterable[str]) -> int:
-        materials_list = [m.lower() for m in materials]
-        if not materials_list:
-            return 30
+# Everything that depends only on (furniture type, shininess) goes in the system
+# prompt so Anthropic's prompt cache can reuse it; the user turn carries the rest.
+SYSTEM_PROMPT_TEMPLATE = """You are an expert Three.js developer. Output only executable JavaScript.
 
-        shininess_map = {
-            "wood": 30,
-            "metal": 100,
-            "plastic": 80,
-            "fabric": 10,
-            "leather": 60,
-            "glass": 150,
-            "stone": 20,
-            "marble": 90,
-        }
-        first_material = materials_list[0]
-        return shininess_map.get(first_material, 30)
+STRICT OUTPUT RULES:
+1. Return a function named `createFurniture` that returns a `THREE.Group`.
+2. Use only core Three.js primitives and materials. Do not load external assets or textures.
+3. Materials should use `THREE.MeshPhongMaterial` with shininess around {shininess}.
+4. Set realistic positions, scales, and rotations. Ensure the object is centred around the origin.
+5. Add small lighting helpers like `THREE.PointLight` when appropriate.
+6. Include comments explaining the major sections of the model.
 
-    @staticmethod
-    def _extract_code(response_text: str) -> str:
-        """Extract JavaScript code from Claude responses that may include fences."""
-        clean = response_text.strip()
-        if "```" in clean:
-            import re
+Functional requirements for a {furniture_type}:
+{requirements}
 
-            match = re.search(r"```(?:javascript|js)?\n?(.*?)```", clean, re.DOTALL)
-            if match:
-                clean = match.group(1)
+Return only the JavaScript function body – no Markdown, explanations, or backticks.
+"""
 
-        if "function createFurniture" in clean:
-            return clean.strip()
 
-        if "const group = new THREE.Group()" in clean:
-            return "function createFurniture() {\n" + clean.strip() + "\n}"
+@lru_cache(maxsize=64)
+def _system_prompt(furniture_type: str, shininess: int) -> str:
+    return SYSTEM_PROMPT_TEMPLATE.format(
+        shininess=shininess,
+        furniture_type=furniture_type,
+        requirements=FURNITURE_REQUIREMENTS.get(furniture_type.lower(), DEFAULT_REQUIREMENTS),
+    )
 
-        return clean.strip()
 
-    def _get_fallback_code(self, furniture_type: str) -> str:
-        fallback_generators = {
-            "chair": """function createFurniture() {
+# Prebuilt models used when Claude is unavailable; the "// FALLBACK_CODE" marker
+# (checked by main.py) is baked in so every lookup returns the same string object.
+_FALLBACK_SOURCES = {
+    "chair": """function createFurniture() {
   const group = new THREE.Group();
 
   // Seat
@@ -241,7 +120,7 @@ Return only the JavaScript function body – no Markdown, explanations, or backt
 
   return group;
 }""",
-            "sofa": """function createFurniture() {
+    "sofa": """function createFurniture() {
   const group = new THREE.Group();
 
   // Base cushion
@@ -269,7 +148,7 @@ Return only the JavaScript function body – no Markdown, explanations, or backt
 
   return group;
 }""",
-            "table": """function createFurniture() {
+    "table": """function createFurniture() {
   const group = new THREE.Group();
 
   // Tabletop
@@ -290,7 +169,7 @@ Return only the JavaScript function body – no Markdown, explanations, or backt
 
   return group;
 }""",
-            "lamp": """function createFurniture() {
+    "lamp": """function createFurniture() {
   const group = new THREE.Group();
 
   // Base
@@ -325,11 +204,7 @@ Return only the JavaScript function body – no Markdown, explanations, or backt
 
   return group;
 }""",
-        }
-
-        fallback_code = fallback_generators.get(
-            furniture_type.lower(),
-            """function createFurniture() {
+    "__default__": """function createFurniture() {
   const group = new THREE.Group();
   const geometry = new THREE.BoxGeometry(1, 1, 1);
   const material = new THREE.MeshPhongMaterial({ color: 0x808080 });
@@ -337,7 +212,378 @@ Return only the JavaScript function body – no Markdown, explanations, or backt
   group.add(mesh);
   return group;
 }""",
+}
+FALLBACK_CODE = MappingProxyType(
+    {key: sys.intern("// FALLBACK_CODE\n" + code) for key, code in _FALLBACK_SOURCES.items()}
+)
+del _FALLBACK_SOURCES
+
+MAX_CONCURRENT_GENERATIONS = 8
+
+# CLAUDE_LATENCY_MODE=optimized answers the interactive single-piece endpoint
+# with a faster model; async/room fan-out keeps the standard model.
+LATENCY_MODE = os.getenv("CLAUDE_LATENCY_MODE", "standard")
+FAST_MODEL_ID = os.getenv("CLAUDE_3D_FAST_MODEL", "claude-haiku-4-5")
+
+CODE_CACHE_PATH = Path(
+    os.getenv("CLAUDE_3D_CACHE_PATH", Path(__file__).resolve().parents[1] / ".cache/claude3d.sqlite3")
+)
+
+
+class _CodeCache:
+    """Exact-match store of generated Three.js code, shared across generator instances."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS code_cache (key TEXT PRIMARY KEY, code TEXT NOT NULL)")
+
+    @staticmethod
+    def key(model_id: str, prompt: str, max_tokens: int) -> str:
+        # The model is part of the key so upgrading Claude never serves old output.
+        return hashlib.sha256(f"{model_id}\0{max_tokens}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT code FROM code_cache WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, code: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO code_cache (key, code) VALUES (?, ?)", (key, code))
+
+
+class FunctionEndDetector:
+    """Finds the closing brace of a JavaScript function while its text streams in
+
+    Braces inside string/template literals and comments are ignored; state is
+    kept across chunks so a token boundary can fall anywhere. The same walk
+    notes whether the function body returns the scene, so validating finished
+    code never needs a second pass over it. Finished createFurniture() code is
+    accepted only once the same walk sees its body close.
+    """
+
+    RETURN_SCENE = "return scene;"
+
+    def __init__(self, marker: str):
+        self.marker = marker
+        self._buffer = ""
+        self._pos: Optional[int] = None
+        self._end: Optional[int] = None
+        self._depth = 0
+        self._state: Optional[str] = None  # quote char, "//" or "/*"
+        self._escaped = False
+        self.returns_scene = False
+
+    @property
+    def text(self) -> str:
+        """Everything received so far, cut right after the function once it closed"""
+        return self._buffer if self._end is None else self._buffer[:self._end]
+
+    @property
+    def closed(self) -> bool:
+        return self._end is not None
+
+    @property
+    def depth(self) -> int:
+        """Open-brace depth at the end of the text seen so far"""
+        return self._depth
+
+    def feed(self, chunk: str) -> bool:
+        """Add streamed text; returns True once the function body has closed"""
+        self._buffer += chunk
+        if self._end is not None:
+            return True
+        if self._pos is None:
+            start = self._buffer.find(self.marker)
+            if start == -1:
+                return False
+            self._pos = start + len(self.marker)
+
+        buffer = self._buffer
+        while self._pos < len(buffer):
+            ch = buffer[self._pos]
+            nxt = buffer[self._pos + 1] if self._pos + 1 < len(buffer) else None
+            if nxt is None and ch in "/*":
+                # Need the next character to tell a comment delimiter apart
+                break
+            self._pos += 1
+
+            if self._state in ('"', "'", "`"):
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == self._state:
+                    self._state = None
+            elif self._state == "//":
+                if ch == "\n":
+                    self._state = None
+            elif self._state == "/*":
+                if ch == "*" and nxt == "/":
+                    self._pos += 1
+                    self._state = None
+            elif ch in ('"', "'", "`"):
+                self._state = ch
+            elif ch == "/" and nxt in ("/", "*"):
+                self._pos += 1
+                self._state = "/" + nxt
+            elif ch == "r" and self._depth == 1:
+                if buffer.startswith(self.RETURN_SCENE, self._pos - 1):
+                    self.returns_scene = True
+                    self._pos += len(self.RETURN_SCENE) - 1
+                elif self.RETURN_SCENE.startswith(buffer[self._pos - 1 :]):
+                    # Could be a split "return scene;"; wait for more text
+                    self._pos -= 1
+                    break
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = self._pos
+                    return True
+        return False
+
+
+@lru_cache(maxsize=1)
+def _code_cache() -> _CodeCache:
+    return _CodeCache(CODE_CACHE_PATH)
+
+
+@lru_cache(maxsize=4)
+def _shared_async_client(api_key: str) -> AnthropicClient:
+    # Generators are created per request; sharing the async client shares its
+    # connection pool so concurrent generations reuse warm TCP/TLS connections.
+    module = importlib.import_module("anthropic")
+    return getattr(module, "AsyncAnthropic")(api_key=api_key)
+
+
+class Claude3DGenerator:
+    """Service for generating 3D furniture models using Claude Sonnet 4.5."""
+
+    def __init__(self, api_key: Optional[str] = None) -> None:
+        self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY")
+        if not self.api_key:
+            raise ValueError("Anthropic API key is required")
+
+        self.model_id = "claude-sonnet-4-5"
+        self.interactive_model_id = FAST_MODEL_ID if LATENCY_MODE == "optimized" else self.model_id
+        self.client: Optional[AnthropicClient] = None
+        self.aclient: Optional[AnthropicClient] = None
+
+        if self.api_key == "dummy":
+            logger.info("Anthropic client disabled (dummy key); using fallback furniture code")
+            return
+
+        try:
+            module = importlib.import_module("anthropic")
+            client_factory = getattr(module, "Anthropic")
+            self.client = client_factory(api_key=self.api_key)
+            self.aclient = _shared_async_client(self.api_key)
+        except ModuleNotFoundError:
+            logger.warning("anthropic package not installed; falling back to static models")
+        except Exception as exc:  # pragma: no cover - network dependency
+            logger.warning("Failed to initialise Anthropic client: %s", exc)
+
+    def generate_furniture_code(
+        self,
+        furniture_type: str,
+        style: str,
+        colors: Iterable[str],
+        materials: Iterable[str],
+        dimensions: Optional[Dict[str, float]] = None,
+        max_tokens: int = 2800,
+    ) -> str:
+        """Generate Three.js code for a furniture item via Claude or fallback."""
+
+        # Nothing below is usable without a client; skip building the prompt
+        if not self.client:
+            logger.debug("Anthropic client missing; returning fallback code for %s", furniture_type)
+            return self._get_fallback_code(furniture_type)
+
+        system_prompt, user_prompt = self._build_prompt(
+            furniture_type=furniture_type,
+            style=style,
+            colors=list(colors),
+            materials=list(materials),
+            dimensions=dimensions or {},
         )
-        if not fallback_code.startswith("// FALLBACK_CODE"):
-            fallback_code = "// FALLBACK_CODE\n" + fallback_code
-        return fallback_code
\ No newline at end of file
+
+        model_id = self.interactive_model_id
+        cache_key = _CodeCache.key(model_id, f"{system_prompt}\0{user_prompt}", max_tokens)
+        cached = _code_cache().get(cache_key)
+        if cached is not None:
+            logger.debug("Serving cached 3D code for %s", furniture_type)
+            return cached
+
+        try:
+            response = self.client.messages.create(
+                **self._request_params(system_prompt, user_prompt, max_tokens, model_id=model_id)
+            )
+            return self._store_generated_code(response, furniture_type, cache_key)
+
+        except Exception as exc:  # pragma: no cover - network dependency
+            logger.error("Failed to generate 3D code via Claude: %s", exc)
+            return self._get_fallback_code(furniture_type)
+
+    async def agenerate_furniture_code(
+        self,
+        furniture_type: str,
+        style: str,
+        colors: Iterable[str],
+        materials: Iterable[str],
+        dimensions: Optional[Dict[str, float]] = None,
+        max_tokens: int = 2800,
+    ) -> str:
+        """Async variant of :meth:`generate_furniture_code` for concurrent fan-out."""
+
+        # Nothing below is usable without a client; skip building the prompt
+        if not self.aclient:
+            logger.debug("Anthropic client missing; returning fallback code for %s", furniture_type)
+            return self._get_fallback_code(furniture_type)
+
+        system_prompt, user_prompt = self._build_prompt(
+            furniture_type=furniture_type,
+            style=style,
+            colors=list(colors),
+            materials=list(materials),
+            dimensions=dimensions or {},
+        )
+
+        cache_key = _CodeCache.key(self.model_id, f"{system_prompt}\0{user_prompt}", max_tokens)
+        cached = _code_cache().get(cache_key)
+        if cached is not None:
+            logger.debug("Serving cached 3D code for %s", furniture_type)
+            return cached
+
+        try:
+            response = await self.aclient.messages.create(**self._request_params(system_prompt, user_prompt, max_tokens))
+            return self._store_generated_code(response, furniture_type, cache_key)
+
+        except Exception as exc:  # pragma: no cover - network dependency
+            logger.error("Failed to generate 3D code via Claude: %s", exc)
+            return self._get_fallback_code(furniture_type)
+
+    async def agenerate_room_pieces(
+        self,
+        specs: Iterable[Dict[str, Any]],
+        *,
+        concurrency: int = MAX_CONCURRENT_GENERATIONS,
+    ) -> list[str]:
+        """Generate several pieces concurrently; ``specs`` are agenerate_furniture_code kwargs.
+
+        Total latency is the slowest piece rather than the sum. Each piece falls
+        back independently, and the semaphore keeps bursts within rate limits.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def _generate(spec: Dict[str, Any]) -> str:
+            async with semaphore:
+                return await self.agenerate_furniture_code(**spec)
+
+        return list(await asyncio.gather(*(_generate(spec) for spec in specs)))
+
+    def _request_params(
+        self, system_prompt: str, user_prompt: str, max_tokens: int, *, model_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "model": model_id or self.model_id,
+            "max_tokens": max_tokens,
+            "temperature": 0.6,
+            "system": [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}],
+            "messages": [{"role": "user", "content": user_prompt}],
+        }
+
+    def _store_generated_code(self, response: Any, furniture_type: str, cache_key: str) -> str:
+        generated_text = response.content[0].text if response.content else ""
+        code = self._extract_code(generated_text)
+
+        if not code.strip():  # pragma: no cover - defensive guard
+            raise ValueError("Claude returned an empty response")
+        if not FunctionEndDetector("function createFurniture").feed(code):
+            # Usually a reply cut off at max_tokens; never cache or reuse it
+            raise ValueError("Claude returned incomplete code")
+
+        logger.info("Successfully generated 3D code for %s", furniture_type)
+        _code_cache().set(cache_key, code)
+        return code
+
+    # ------------------------------------------------------------------
+    # Prompt construction helpers
+
+    def _build_prompt(
+        self,
+        furniture_type: str,
+        style: str,
+        colors: list[str],
+        materials: list[str],
+        dimensions: Dict[str, float],
+    ) -> tuple[str, str]:
+        """Return ``(system_prompt, user_prompt)``; the system part is shared across users."""
+        color_text = ", ".join(colors) if colors else "neutral palette"
+        material_text = ", ".join(materials) if materials else "wood"
+        dimension_text = self._format_dimensions(dimensions)
+        shininess = self._get_material_shininess(materials)
+
+        system_prompt = _system_prompt(furniture_type, shininess)
+        user_prompt = f"""Design a {style} {furniture_type} that matches this specification.
+
+Visual palette: {color_text}
+Primary materials: {material_text}
+{dimension_text}
+"""
+        return system_prompt, user_prompt
+
+    @staticmethod
+    def _format_dimensions(dimensions: Dict[str, float]) -> str:
+        if not dimensions:
+            return "Approximate furniture size: standard proportions for the chosen type."
+
+        parts = []
+        for key in ("width", "depth", "height"):
+            if key in dimensions:
+                parts.append(f"{key}: {dimensions[key]:.2f}m")
+        return "Approximate dimensions: " + ", ".join(parts)
+
+    @staticmethod
+    def _get_material_shininess(materials: Iterable[str]) -> int:
+        materials_list = [m.lower() for m in materials]
+        if not materials_list:
+            return 30
+
+        shininess_map = {
+            "wood": 30,
+            "metal": 100,
+            "plastic": 80,
+            "fabric": 10,
+            "leather": 60,
+            "glass": 150,
+            "stone": 20,
+            "marble": 90,
+        }
+        first_material = materials_list[0]
+        return shininess_map.get(first_material, 30)
+
+    @staticmethod
+    def _extract_code(response_text: str) -> str:
+        """Extract JavaScript code from Claude responses that may include fences."""
+        clean = response_text.strip()
+        if "```" in clean:
+            match = _CODE_FENCE.search(clean)
+            if match:
+                clean = match.group(1)
+
+        if "function createFurniture" in clean:
+            return clean.strip()
+
+        if "const group = new THREE.Group()" in clean:
+            return "function createFurniture() {\n" + clean.strip() + "\n}"
+
+        return clean.strip()
+
+    @staticmethod
+    def _get_fallback_code(furniture_type: str) -> str:
+        return FALLBACK_CODE.get(furniture_type.lower(), FALLBACK_CODE["__default__"])
\ No newline at end of file
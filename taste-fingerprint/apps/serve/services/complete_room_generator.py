@@ -4,13 +4,58 @@ Generates entire Three.js rooms from images with ALL objects
 """
 
 import os
+import re
+import time
 import base64
 import logging
-from typing import Optional, Dict, Any
-from anthropic import Anthropic
+from functools import lru_cache
+from typing import Optional, Dict, Any, List
+
+from .claude_3d_generator import FunctionEndDetector
 
 logger = logging.getLogger(__name__)
 
+_DATA_URI = re.compile(r'data:image/([^;]+);base64,(.+)')
+_CODE_FENCE = re.compile(r'```(?:javascript|js)?\n?(.*?)```', re.DOTALL)
+# Unterminated fence (e.g. a truncated reply): skip the language line, keep the rest
+_OPEN_CODE_FENCE = re.compile(r'```(?:(?:javascript|js)[^\n]*\n)?(.*)', re.DOTALL)
+
+MODEL_ID = "claude-sonnet-4-5"  # Latest Claude Sonnet 4.5 (2025)
+
+# A reply cut off at max_tokens is resumed from where it stopped (the partial
+# code is sent back as the assistant turn) up to this many times
+MAX_CONTINUATIONS = 2
+
+
+@lru_cache(maxsize=4)
+def get_client(api_key: str):
+    """Anthropic client shared by every generator built with this key
+    
+    Generators are created per request; sharing the client shares its
+    connection pool, so only the first request pays for DNS/TCP/TLS setup.
+    """
+    # Imported here so loading this module doesn't pull in the SDK (httpx, pydantic)
+    from anthropic import Anthropic
+    return Anthropic(api_key=api_key)
+
+
+def warm_up_client(api_key: Optional[str] = None) -> None:
+    """Open the shared client's connection with a cheap token-count call
+    
+    Meant to run once in the background at startup; failures are only logged.
+    """
+    api_key = api_key or os.getenv('ANTHROPIC_API_KEY')
+    if not api_key:
+        return
+    try:
+        get_client(api_key).messages.count_tokens(
+            model=MODEL_ID,
+            messages=[{"role": "user", "content": "hi"}]
+        )
+    except Exception as e:
+        logger.warning(f"Anthropic client warm-up failed: {str(e)}")
+
+
 class CompleteRoomGenerator:
     """Generate complete Three.js room scenes from images using Claude Vision"""
     
@@ -20,8 +65,8 @@ class CompleteRoomGenerator:
         if not self.api_key:
             raise ValueError("Anthropic API key is required")
         
-        self.client = Anthropic(api_key=self.api_key)
-        self.model_id = "claude-sonnet-4-5"  # Latest Claude Sonnet 4.5 (2025)
+        self.client = get_client(self.api_key)
+        self.model_id = MODEL_ID
     
     def generate_complete_room_from_image(
         self,
@@ -43,76 +88,35 @@ class CompleteRoomGenerator:
             Dictionary with generated Three.js code and metadata
         """
         
-        # Build the prompt for complete room generation
-        prompt = self._build_complete_room_prompt(room_description, existing_code)
-        
         try:
-            # If image is base64, prepare for Claude Vision API
-            messages = []
+            messages = self._build_messages(image_data, room_description, existing_code)
             
-            if image_data.startswith('data:'):
-                # Extract base64 data
-                import re
-                match = re.match(r'data:image/([^;]+);base64,(.+)', image_data)
-                if match:
-                    media_type = f"image/{match.group(1)}"
-                    base64_data = match.group(2)
-                    
-                    messages = [{
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "image",
-                                "source": {
-                                    "type": "base64",
-                                    "media_type": media_type,
-                                    "data": base64_data
-                                }
-                            },
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }]
-            else:
-                # For now, use text-only with description
-                messages = [{
-                    "role": "user",
-                    "content": prompt + f"\n\nImage URL: {image_data}\n\nUser description: {room_description or 'Modern bedroom with all furniture'}"
-                }]
-            
-            # Call Claude API with vision capabilities
-            response = self.client.messages.create(
-                model=self.model_id,
-                max_tokens=max_tokens,
-                temperature=0.7,
-                messages=messages
-            )
-            
-            # Extract the generated code
-            generated_text = response.content[0].text
-            code = self._extract_complete_code(generated_text)
-            
-            # Ensure the code is complete
-            if not code.endswith('}'):
-                # Try to complete the function
-                if 'return scene;' in code and not code.strip().endswith('}'):
-                    code = code + '\n}'
-                else:
-                    # Use fallback if incomplete
-                    logger.warning("Generated code appears incomplete, using fallback")
-                    code = self._get_fallback_complete_room()
+            # Stream from Claude and stop as soon as createCompleteRoom() is closed,
+            # instead of waiting for (and paying for) any trailing prose
+            detector = FunctionEndDetector("function createCompleteRoom")
+            request_messages = messages
+            for attempt in range(MAX_CONTINUATIONS + 1):
+                with self.client.messages.stream(
+                    model=self.model_id,
+                    max_tokens=max_tokens,
+                    temperature=0.7,
+                    messages=request_messages
+                ) as stream:
+                    for text in stream.text_stream:
+                        if detector.feed(text):
+                            break
+                    if detector.closed or stream.get_final_message().stop_reason != "max_tokens":
+                        break
+                if attempt == MAX_CONTINUATIONS:
+                    break
+                
+                # Truncated mid-function: continue it instead of discarding the tokens
+                logger.warning(f"Room code truncated at max_tokens; continuing (attempt {attempt + 1})")
+                request_messages = messages + [
+                    {"role": "assistant", "content": detector.text.rstrip()}
+                ]
             
-            logger.info(f"Successfully generated complete room with {len(code)} characters")
-            
-            return {
-                "code": code,
-                "source": "claude-vision-complete" if 'return scene;' in code else "fallback",
-                "model": self.model_id,
-                "description": room_description,
-                "tokens_used": len(code) // 4  # Rough estimate
-            }
+            return self._room_result(detector.text, room_description)
             
         except Exception as e:
             logger.error(f"Failed to generate complete room: {str(e)}")
@@ -123,6 +127,148 @@ class CompleteRoomGenerator:
                 "error": str(e)
             }
     
+    def generate_many(
+        self,
+        jobs: List[Dict[str, Any]],
+        max_tokens: int = 8000,
+        poll_timeout: float = 3600.0
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Generate several rooms through the Message Batches API
+        
+        Batched requests are billed at half price and run concurrently on
+        Anthropic's side, but a batch can take minutes to finish, so this is
+        meant for bulk/offline generation rather than interactive requests.
+        
+        Args:
+            jobs: Dicts with "id" (used as the batch custom_id), "image_data",
+                and optional "description" / "existing_code"
+            max_tokens: Maximum tokens per room
+            poll_timeout: Seconds to wait for the batch before giving up
+        
+        Returns:
+            Mapping of job id to the same dictionary generate_complete_room_from_image returns
+        """
+        descriptions = {job["id"]: job.get("description") for job in jobs}
+        requests = [
+            {
+                "custom_id": job["id"],
+                "params": {
+                    "model": self.model_id,
+                    "max_tokens": max_tokens,
+                    "temperature": 0.7,
+                    "messages": self._build_messages(
+                        job["image_data"], job.get("description"), job.get("existing_code")
+                    ),
+                },
+            }
+            for job in jobs
+        ]
+        batch = self.client.messages.batches.create(requests=requests)
+        
+        # Poll with exponential backoff (1s doubling, capped at 30s)
+        delay = 1.0
+        deadline = time.monotonic() + poll_timeout
+        while batch.processing_status != "ended":
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Message batch {batch.id} did not finish within {poll_timeout:.0f}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 30.0)
+            batch = self.client.messages.batches.retrieve(batch.id)
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        for entry in self.client.messages.batches.results(batch.id):
+            if entry.result.type == "succeeded":
+                results[entry.custom_id] = self._room_result(
+                    entry.result.message.content[0].text, descriptions.get(entry.custom_id)
+                )
+            else:
+                logger.error(f"Batched room generation {entry.custom_id} {entry.result.type}")
+                results[entry.custom_id] = {
+                    "code": self._get_fallback_complete_room(),
+                    "source": "fallback",
+                    "error": f"batch request {entry.result.type}"
+                }
+        return results
+    
+    def _build_messages(
+        self,
+        image_data: str,
+        room_description: Optional[str],
+        existing_code: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        """Build the Claude messages for one room (vision input when given a data URL)"""
+        
+        # Build the prompt for complete room generation
+        prompt = self._build_complete_room_prompt(room_description, existing_code)
+        
+        # If image is base64, prepare for Claude Vision API
+        messages = []
+        
+        if image_data.startswith('data:'):
+            # Extract base64 data
+            match = _DATA_URI.match(image_data)
+            if match:
+                media_type = f"image/{match.group(1)}"
+                base64_data = match.group(2)
+                
+                messages = [{
+                    "role": "user",
+                    "content": [
+                        {
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": media_type,
+                                "data": base64_data
+                            }
+                        },
+                        {
+                            "type": "text",
+                            "text": prompt
+                        }
+                    ]
+                }]
+        else:
+            # For now, use text-only with description
+            messages = [{
+                "role": "user",
+                "content": prompt + f"\n\nImage URL: {image_data}\n\nUser description: {room_description or 'Modern bedroom with all furniture'}"
+            }]
+        
+        return messages
+    
+    def _room_result(self, generated_text: str, room_description: Optional[str]) -> Dict[str, Any]:
+        """Turn Claude's raw reply into the response dictionary"""
+        code = self._extract_complete_code(generated_text)
+        
+        # One pass over the code for both brace balance and the final return
+        scan = FunctionEndDetector("function createCompleteRoom")
+        scan.feed(code)
+        returns_scene = scan.returns_scene
+        
+        # Ensure the code is complete
+        if scan.closed:
+            code = scan.text
+        elif returns_scene and scan.depth == 1:
+            # Only the function's own closing brace is missing
+            code = code + '\n}'
+        else:
+            # Use fallback if incomplete
+            logger.warning("Generated code appears incomplete, using fallback")
+            code = self._get_fallback_complete_room()
+            returns_scene = False
+        
+        logger.info(f"Successfully generated complete room with {len(code)} characters")
+        
+        return {
+            "code": code,
+            "source": "claude-vision-complete" if returns_scene else "fallback",
+            "model": self.model_id,
+            "description": room_description,
+            "tokens_used": len(code) // 4  # Rough estimate
+        }
+    
     def _build_complete_room_prompt(self, description: Optional[str], existing_code: Optional[str]) -> str:
         """Build prompt for complete room generation"""
         
@@ -216,22 +362,9 @@ OUTPUT ONLY PURE JAVASCRIPT - NO EXPLANATIONS OR MARKDOWN!"""
         
         # Remove markdown if present
         if "```" in clean:
-            import re
-            pattern = r'```(?:javascript|js)?\n?(.*?)```'
-            match = re.search(pattern, clean, re.DOTALL)
+            match = _CODE_FENCE.search(clean) or _OPEN_CODE_FENCE.search(clean)
             if match:
                 clean = match.group(1).strip()
-            else:
-                # Try to extract between first ``` and last ```
-                start = clean.find('```')
-                if start != -1:
-                    clean = clean[start+3:]
-                    # Skip language identifier
-                    if clean.startswith('javascript') or clean.startswith('js'):
-                        clean = clean[clean.find('\n')+1:]
-                    end = clean.rfind('```')
-                    if end != -1:
-                        clean = clean[:end].strip()
         
         # Ensure function exists
         if "function createCompleteRoom" not in clean:
@@ -14,58 +14,145 @@ pip install objaverse
 Documentation: https://objaverse.allenai.org/
 """
 
-import objaverse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
+
+# objaverse/pyarrow/requests are imported inside the functions that use them so
+# importing this module stays cheap when a source is never queried.
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+# Objaverse annotations flattened to one row per object; built from
+# objaverse.load_annotations() on first use. Stored as uncompressed Arrow IPC
+# and memory-mapped, so opening it is a few page faults instead of a JSON parse
+# and every worker process shares the same page-cache copy.
+OBJAVERSE_INDEX_PATH = Path(__file__).resolve().parents[1] / '.cache' / 'objaverse_annotations.arrow'
+_objaverse_index: Optional['pa.Table'] = None
+OBJAVERSE_DOWNLOAD_PROCESSES = 16
+
+# One pooled, retrying HTTP session shared by the Sketchfab/PolyHaven fetchers so
+# repeat queries reuse keep-alive connections instead of a new TLS handshake each.
+HTTP_TIMEOUT = (3.05, 10)
+POLYHAVEN_FETCH_WORKERS = 16
+_http_session = None
+
+# Sketchfab search results keyed by (query, category, limit) -> (expiry, results)
+SKETCHFAB_CACHE_TTL = 600
+SKETCHFAB_CACHE_SIZE = 256
+_sketchfab_cache: dict[tuple[str, str, int], tuple[float, list[dict]]] = {}
+
+
+def _get_http_session():
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        retry = Retry(total=3, backoff_factor=0.3, status_forcelist=[429, 500, 502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=retry)
+        _http_session = requests.Session()
+        _http_session.mount('https://', adapter)
+        _http_session.headers['Accept-Encoding'] = 'gzip'
+    return _http_session
+
+
+def _load_objaverse_index() -> 'pa.Table':
+    global _objaverse_index
+    if _objaverse_index is None:
+        import pyarrow as pa
+        import pyarrow.feather as feather
+        
+        if not OBJAVERSE_INDEX_PATH.exists():
+            import objaverse
+            
+            annotations = objaverse.load_annotations()
+            names = [annotation.get('name', '') for annotation in annotations.values()]
+            table = pa.table({
+                'uid': list(annotations.keys()),
+                'name': names,
+                'name_lower': [name.lower() for name in names],
+                # Tags are nested objects; kept as JSON and decoded only for hits
+                'tags': [json.dumps(annotation.get('tags', [])) for annotation in annotations.values()],
+                'license': [annotation.get('license', '') for annotation in annotations.values()],
+            })
+            OBJAVERSE_INDEX_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = OBJAVERSE_INDEX_PATH.with_suffix('.tmp')
+            # Uncompressed so the mapped file is usable in place
+            feather.write_feather(table, tmp_path, compression='uncompressed')
+            tmp_path.replace(OBJAVERSE_INDEX_PATH)
+        _objaverse_index = feather.read_table(OBJAVERSE_INDEX_PATH, memory_map=True)
+    return _objaverse_index
 
 def fetch_from_objaverse(query: str, category: str, limit: int) -> list[dict]:
     """
     Search Objaverse dataset for 3D furniture models.
     Objaverse has 800K+ high-quality 3D assets.
     """
-    # Load available objects
-    annotations = objaverse.load_annotations()
+    import numpy as np
+    import objaverse
+    import pyarrow.compute as pc
+    
+    # Load the cached annotation index
+    index = _load_objaverse_index()
     
-    # Filter by category and search terms
-    filtered = []
+    # Filter by search terms with vectorized plain-substring scans over the mapped
+    # name column, OR-ing into one mask; only the first `limit` rows become Python objects
     search_terms = query.lower().split()
+    if not search_terms:
+        return []
+    names = index.column('name_lower')
+    mask = np.zeros(index.num_rows, dtype=bool)
+    for term in dict.fromkeys(search_terms):
+        mask |= pc.match_substring(names, term).to_numpy()
+    hits = index.take(np.flatnonzero(mask)[:limit]).to_pylist()
     
-    for uid, annotation in annotations.items():
-        name = annotation.get('name', '').lower()
-        tags = annotation.get('tags', [])
-        
-        # Match search terms
-        if any(term in name for term in search_terms):
-            filtered.append({
-                'uid': uid,
-                'name': annotation.get('name', ''),
-                'tags': tags,
-                'license': annotation.get('license', ''),
-            })
-        
-        if len(filtered) >= limit:
-            break
+    filtered = [
+        {
+            'uid': row['uid'],
+            'name': row['name'],
+            'tags': json.loads(row['tags']),
+            'license': row['license'],
+        }
+        for row in hits
+    ]
+    
+    if not filtered:
+        return []
+    
+    # Download the 3D models in one concurrent batch; returns uid -> local .glb path
+    uids = [item['uid'] for item in filtered]
+    try:
+        local_paths = objaverse.load_objects(
+            uids=uids,
+            download_processes=min(OBJAVERSE_DOWNLOAD_PROCESSES, len(uids)),
+        )
+    except Exception as e:
+        print(f"Error loading objects {uids}: {e}")
+        return []
     
-    # Download the 3D models
     results = []
     for item in filtered:
-        try:
-            # Download returns local path to .glb file
-            local_path = objaverse.load_objects([item['uid']])[item['uid']]
-            
-            # You'd upload to your CDN/storage here
-            # For now, we'll use local path
-            results.append({
-                'id': f"objaverse_{item['uid']}",
-                'name': item['name'],
-                'category': category,
-                'model_url': local_path,  # Upload to CDN in production
-                'thumbnail_url': f"https://objaverse.allenai.org/thumbnails/{item['uid']}.png",
-                'style_tags': item['tags'],
-                'source': 'objaverse',
-                'license': item['license']
-            })
-        except Exception as e:
-            print(f"Error loading object {item['uid']}: {e}")
+        local_path = local_paths.get(item['uid'])
+        if local_path is None:
+            print(f"Error loading object {item['uid']}: not downloaded")
             continue
+        
+        # You'd upload to your CDN/storage here
+        # For now, we'll use local path
+        results.append({
+            'id': f"objaverse_{item['uid']}",
+            'name': item['name'],
+            'category': category,
+            'model_url': local_path,  # Upload to CDN in production
+            'thumbnail_url': f"https://objaverse.allenai.org/thumbnails/{item['uid']}.png",
+            'style_tags': item['tags'],
+            'source': 'objaverse',
+            'license': item['license']
+        })
     
     return results
 
@@ -81,7 +168,6 @@ Setup:
 3. Add to .env: SKETCHFAB_API_KEY=your_token_here
 """
 
-import requests
 import os
 
 SKETCHFAB_API_KEY = os.getenv('SKETCHFAB_API_KEY')
@@ -91,6 +177,11 @@ def fetch_from_sketchfab(query: str, category: str, limit: int) -> list[dict]:
     Search Sketchfab for downloadable 3D models.
     Note: Only returns models that allow downloading.
     """
+    cache_key = (query, category, limit)
+    cached = _sketchfab_cache.get(cache_key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+    
     headers = {'Authorization': f'Token {SKETCHFAB_API_KEY}'}
     
     params = {
@@ -101,10 +192,11 @@ def fetch_from_sketchfab(query: str, category: str, limit: int) -> list[dict]:
         'sort_by': '-likeCount'  # Most popular first
     }
     
-    response = requests.get(
+    response = _get_http_session().get(
         'https://api.sketchfab.com/v3/search',
         params=params,
-        headers=headers
+        headers=headers,
+        timeout=HTTP_TIMEOUT
     )
     response.raise_for_status()
     data = response.json()
@@ -128,6 +220,9 @@ def fetch_from_sketchfab(query: str, category: str, limit: int) -> list[dict]:
             'author': model['user']['displayName']
         })
     
+    if len(_sketchfab_cache) >= SKETCHFAB_CACHE_SIZE:
+        _sketchfab_cache.pop(next(iter(_sketchfab_cache)))
+    _sketchfab_cache[cache_key] = (time.monotonic() + SKETCHFAB_CACHE_TTL, results)
     return results
 
 
@@ -146,42 +241,59 @@ def fetch_from_polyhaven(category: str, limit: int) -> list[dict]:
     Fetch 3D models from PolyHaven.
     All assets are CC0 (public domain).
     """
-    # Get list of all assets
-    response = requests.get('https://api.polyhaven.com/assets')
+    session = _get_http_session()
+    
+    # Get list of all model assets (the API filters by type server-side)
+    response = session.get('https://api.polyhaven.com/assets', params={'t': 'models'}, timeout=HTTP_TIMEOUT)
     response.raise_for_status()
     all_assets = response.json()
     
-    results = []
-    for asset_id, asset_info in all_assets.items():
-        # Filter by type (we want models)
-        if asset_info.get('type') != 'model':
-            continue
-        
-        # Get detailed info
-        detail_response = requests.get(f'https://api.polyhaven.com/files/{asset_id}')
+    # t=models already limits the listing to models; narrow it by category so
+    # detail requests are only spent on relevant assets, or use all models if
+    # nothing is tagged with it
+    model_ids = list(all_assets)
+    wanted = category.lower()
+    in_category = [
+        asset_id for asset_id in model_ids
+        if wanted in (tag.lower() for tag in all_assets[asset_id].get('categories', []))
+    ]
+    if in_category:
+        model_ids = in_category
+    
+    def fetch_files(asset_id: str) -> dict:
+        detail_response = session.get(f'https://api.polyhaven.com/files/{asset_id}', timeout=HTTP_TIMEOUT)
         detail_response.raise_for_status()
-        files = detail_response.json()
-        
-        # Get GLTF file URL
-        gltf_url = None
-        if 'gltf' in files:
-            gltf_url = files['gltf']['4k']['gltf']['url']  # Or choose resolution
-        
-        if gltf_url:
-            results.append({
-                'id': f"polyhaven_{asset_id}",
-                'name': asset_info['name'],
-                'category': category,
-                'model_url': gltf_url,
-                'thumbnail_url': f"https://cdn.polyhaven.com/asset_img/primary/{asset_id}.png",
-                'style_tags': asset_info.get('tags', []),
-                'price': 0,  # All free CC0
-                'source': 'polyhaven',
-                'license': 'CC0'
-            })
-        
-        if len(results) >= limit:
-            break
+        return detail_response.json()
+    
+    # Get detailed info a window of assets at a time, concurrently over the pooled
+    # session; map() keeps catalog order and we stop once `limit` models are found
+    results = []
+    with ThreadPoolExecutor(max_workers=POLYHAVEN_FETCH_WORKERS) as executor:
+        for start in range(0, len(model_ids), POLYHAVEN_FETCH_WORKERS):
+            window = model_ids[start:start + POLYHAVEN_FETCH_WORKERS]
+            for asset_id, files in zip(window, executor.map(fetch_files, window)):
+                asset_info = all_assets[asset_id]
+                
+                # Get GLTF file URL
+                gltf_url = None
+                if 'gltf' in files:
+                    gltf_url = files['gltf']['4k']['gltf']['url']  # Or choose resolution
+                
+                if gltf_url:
+                    results.append({
+                        'id': f"polyhaven_{asset_id}",
+                        'name': asset_info['name'],
+                        'category': category,
+                        'model_url': gltf_url,
+                        'thumbnail_url': f"https://cdn.polyhaven.com/asset_img/primary/{asset_id}.png",
+                        'style_tags': asset_info.get('tags', []),
+                        'price': 0,  # All free CC0
+                        'source': 'polyhaven',
+                        'license': 'CC0'
+                    })
+                
+                if len(results) >= limit:
+                    return results
     
     return results
 
@@ -2,16 +2,33 @@ from __future__ import annotations
 
 """Shared CLIP embedding utilities for the FurnishML backend and ingest scripts."""
 
+import importlib
+import os
 from functools import lru_cache
 from pathlib import Path
-from typing import Literal
+from typing import Any, Callable, Literal, Optional, Sequence
 
 import numpy as np
 import torch
+from PIL import Image
+from torch.utils.data import DataLoader, Dataset
 from transformers import CLIPModel, CLIPProcessor
 
 ModelName = Literal["openai/clip-vit-base-patch32"]
 
+# On CUDA the model runs in bfloat16; CLIP_COMPILE=1 additionally compiles the
+# vision tower (worth it for batch ingest, not for the API's cold start).
+DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+COMPILE_MODEL = os.getenv("CLIP_COMPILE") == "1"
+# CLIP_QUANTIZE=1 swaps the Linear layers for dynamic int8 ones on CPU (fbgemm/
+# qnnpack GEMMs); vectors shift slightly, so re-embed catalogs under the same setting.
+QUANTIZE_MODEL = os.getenv("CLIP_QUANTIZE") == "1"
+
+# CLIP_USE_ONNX=1 runs both towers through ONNX Runtime instead (mainly for
+# CPU-only serving and ingest); graphs are exported once and reused from ONNX_CACHE_DIR.
+USE_ONNX = os.getenv("CLIP_USE_ONNX") == "1"
+ONNX_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache/onnx"
+
 
 @lru_cache(maxsize=1)
 def _load_processor(model_name: ModelName) -> CLIPProcessor:
@@ -22,33 +39,281 @@ def _load_processor(model_name: ModelName) -> CLIPProcessor:
 def _load_model(model_name: ModelName) -> CLIPModel:
     model = CLIPModel.from_pretrained(model_name)
     model.eval()
+    if DEVICE.type == "cpu" and QUANTIZE_MODEL:
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    if DEVICE.type == "cuda":
+        model = model.to(DEVICE, dtype=torch.bfloat16)
+        if COMPILE_MODEL:
+            # get_image_features calls vision_model directly, bypassing forward()
+            model.vision_model = torch.compile(model.vision_model, mode="max-autotune")
+            image_size = model.config.vision_config.image_size
+            with torch.no_grad():
+                model.get_image_features(
+                    pixel_values=torch.zeros(1, 3, image_size, image_size, device=DEVICE, dtype=model.dtype)
+                )
     return model
 
 
-def _to_numpy(vec: torch.Tensor) -> np.ndarray:
-    arr = vec[0].detach().cpu().numpy().astype("float32")
-    norm = np.linalg.norm(arr)
-    if norm > 0:
-        arr /= norm
+class _ImageFeatures(torch.nn.Module):
+    def __init__(self, model: CLIPModel) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, pixel_values: torch.Tensor) -> torch.Tensor:
+        return self.model.get_image_features(pixel_values=pixel_values)
+
+
+class _TextFeatures(torch.nn.Module):
+    def __init__(self, model: CLIPModel) -> None:
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids: torch.Tensor, attention_mask: torch.Tensor) -> torch.Tensor:
+        return self.model.get_text_features(input_ids=input_ids, attention_mask=attention_mask)
+
+
+def _export_onnx(model_name: ModelName, tower: Literal["image", "text"], onnx_path: Path) -> None:
+    # Export from a fresh fp32 CPU copy, not the bf16/compiled serving model.
+    model = CLIPModel.from_pretrained(model_name).eval()
+    if tower == "image":
+        image_size = _load_processor(model_name).image_processor.crop_size["height"]
+        module: torch.nn.Module = _ImageFeatures(model)
+        args: tuple = (torch.zeros(1, 3, image_size, image_size),)
+        dynamic_axes = {"pixel_values": {0: "batch"}}
+    else:
+        sample = _load_processor(model_name)(text=["a photo of a chair"], return_tensors="pt", padding=True)
+        module = _TextFeatures(model)
+        args = (sample["input_ids"], sample["attention_mask"])
+        dynamic_axes = {"input_ids": {0: "batch", 1: "sequence"}, "attention_mask": {0: "batch", 1: "sequence"}}
+    input_names = list(dynamic_axes)
+    output_name = f"{tower}_embeds"
+
+    ONNX_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = onnx_path.with_suffix(".tmp")
+    torch.onnx.export(
+        module,
+        args,
+        str(tmp_path),
+        input_names=input_names,
+        output_names=[output_name],
+        dynamic_axes={**dynamic_axes, output_name: {0: "batch"}},
+        opset_version=17,
+    )
+    tmp_path.replace(onnx_path)
+
+
+@lru_cache(maxsize=2)
+def _load_onnx_session(model_name: ModelName, tower: Literal["image", "text"]) -> Any:
+    try:
+        ort = importlib.import_module("onnxruntime")
+    except ModuleNotFoundError as exc:
+        raise RuntimeError("CLIP_USE_ONNX=1 requires the onnxruntime package") from exc
+
+    onnx_path = ONNX_CACHE_DIR / f"{model_name.replace('/', '__')}-{tower}.onnx"
+    if not onnx_path.exists():
+        _export_onnx(model_name, tower, onnx_path)
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = os.cpu_count() or 1
+    available = ort.get_available_providers()
+    providers = [name for name in ("CUDAExecutionProvider", "CPUExecutionProvider") if name in available]
+    return ort.InferenceSession(str(onnx_path), options, providers=providers)
+
+
+def _model_inputs(inputs: Any, model: CLIPModel) -> dict[str, torch.Tensor]:
+    return {
+        key: value.to(model.device, dtype=model.dtype) if value.is_floating_point() else value.to(model.device)
+        for key, value in inputs.items()
+    }
+
+
+def _to_numpy_rows(vectors: torch.Tensor) -> np.ndarray:
+    # Normalize on the model's device in fp32, then copy to host once
+    return torch.nn.functional.normalize(vectors.detach().float(), p=2, dim=-1).cpu().numpy()
+
+
+def _normalize_rows(arr: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(arr, axis=1, keepdims=True)
+    np.divide(arr, norms, out=arr, where=norms > 0)
     return arr
 
 
 def embed_image(pil_image, *, model_name: ModelName = "openai/clip-vit-base-patch32") -> np.ndarray:
+    pixel_values = preprocess_images([pil_image], model_name=model_name)
+    return embed_pixel_values(pixel_values, model_name=model_name)[0]
+
+
+def open_image_rgb(path: Path, *, model_name: ModelName = "openai/clip-vit-base-patch32") -> Image.Image:
+    """Decode an image file to RGB, letting libjpeg downscale JPEGs while decoding.
+
+    ``draft`` picks the largest 1/2, 1/4 or 1/8 DCT scale that still leaves the
+    short edge at or above CLIP's input size, so big product photos are never
+    fully decoded only to be resized to 224px.
+    """
+    target = _load_processor(model_name).image_processor.size["shortest_edge"]
+    with Image.open(path) as img:
+        img.draft("RGB", (target, target))
+        if img.mode == "RGB":
+            # Most catalog JPEGs already are; skip convert()'s full-image copy.
+            img.load()
+            return img
+        return img.convert("RGB")
+
+
+def preprocess_images(pil_images: Sequence, *, model_name: ModelName = "openai/clip-vit-base-patch32") -> torch.Tensor:
+    """Run CLIP image preprocessing only; returns a float32 ``pixel_values`` batch."""
     processor = _load_processor(model_name)
+    return processor(images=list(pil_images), return_tensors="pt")["pixel_values"]
+
+
+def embed_pixel_values(
+    pixel_values: torch.Tensor,
+    *,
+    model_name: ModelName = "openai/clip-vit-base-patch32",
+) -> np.ndarray:
+    """Embed an already-preprocessed batch; returns an (N, D) float32 matrix."""
+    if USE_ONNX:
+        session = _load_onnx_session(model_name, "image")
+        (vectors,) = session.run(None, {"pixel_values": pixel_values.float().numpy()})
+        return _normalize_rows(vectors.astype(np.float32, copy=False))
+
     model = _load_model(model_name)
     with torch.no_grad():
-        inputs = processor(images=pil_image, return_tensors="pt")
-        vectors = model.get_image_features(**inputs)
-    return _to_numpy(vectors)
+        pixel_values = pixel_values.to(model.device, dtype=model.dtype, non_blocking=True)
+        return _to_numpy_rows(model.get_image_features(pixel_values=pixel_values))
+
+
+def _concat_rows(chunks: list[np.ndarray], model_name: ModelName) -> np.ndarray:
+    if not chunks:
+        return np.empty((0, _load_model(model_name).config.projection_dim), dtype="float32")
+    return np.concatenate(chunks)
+
+
+def embed_images(
+    pil_images: Sequence,
+    *,
+    batch_size: int = 32,
+    model_name: ModelName = "openai/clip-vit-base-patch32",
+) -> np.ndarray:
+    """Embed images in batched forward passes; returns an (N, D) float32 matrix."""
+    chunks: list[np.ndarray] = []
+    for start in range(0, len(pil_images), batch_size):
+        pixel_values = preprocess_images(pil_images[start : start + batch_size], model_name=model_name)
+        chunks.append(embed_pixel_values(pixel_values, model_name=model_name))
+    return _concat_rows(chunks, model_name)
+
+
+class _ImageSourceDataset(Dataset):
+    """Loads and preprocesses one image per index, inside DataLoader workers."""
+
+    def __init__(self, sources: Sequence[Any], loader: Callable[[Any], Image.Image], model_name: ModelName) -> None:
+        self.sources = sources
+        self.loader = loader
+        self.model_name = model_name
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def __getitem__(self, index: int) -> torch.Tensor:
+        image = self.loader(self.sources[index])
+        try:
+            return preprocess_images([image], model_name=self.model_name)[0]
+        finally:
+            image.close()
 
 
+def embed_image_sources(
+    sources: Sequence[Any],
+    loader: Callable[[Any], Image.Image],
+    *,
+    batch_size: int = 32,
+    num_workers: Optional[int] = None,
+    model_name: ModelName = "openai/clip-vit-base-patch32",
+) -> np.ndarray:
+    """Embed images from paths/URLs, decoding upcoming batches in worker processes.
+
+    ``loader`` turns one source into an RGB PIL image and must be picklable
+    (a module-level function). Rows come back in ``sources`` order.
+    """
+    workers = min(8, os.cpu_count() or 1) if num_workers is None else num_workers
+    data_loader = DataLoader(
+        _ImageSourceDataset(sources, loader, model_name),
+        batch_size=batch_size,
+        num_workers=workers,
+        pin_memory=DEVICE.type == "cuda",
+        prefetch_factor=4 if workers else None,
+    )
+    chunks = [embed_pixel_values(batch, model_name=model_name) for batch in data_loader]
+    return _concat_rows(chunks, model_name)
+
+
+@lru_cache(maxsize=4096)
 def embed_text(text: str, *, model_name: ModelName = "openai/clip-vit-base-patch32") -> np.ndarray:
-    processor = _load_processor(model_name)
+    """Embed one text; repeated queries are served from an LRU cache.
+
+    The returned vector is shared between callers, so it is read-only.
+    """
+    vec = embed_texts([text], model_name=model_name)[0]
+    vec.setflags(write=False)
+    return vec
+
+
+def embed_texts(
+    texts: Sequence[str],
+    *,
+    batch_size: int = 32,
+    model_name: ModelName = "openai/clip-vit-base-patch32",
+) -> np.ndarray:
+    """Embed texts in batched forward passes; returns an (N, D) float32 matrix."""
+    # Call the tokenizer directly: CLIPProcessor.__call__ only adds image/text
+    # dispatch and output merging on top of it for text-only input.
+    tokenizer = _load_processor(model_name).tokenizer
+    chunks: list[np.ndarray] = []
+    if USE_ONNX:
+        session = _load_onnx_session(model_name, "text")
+        for start in range(0, len(texts), batch_size):
+            inputs = tokenizer(list(texts[start : start + batch_size]), return_tensors="np", padding=True)
+            (vectors,) = session.run(
+                None,
+                {
+                    "input_ids": inputs["input_ids"].astype(np.int64, copy=False),
+                    "attention_mask": inputs["attention_mask"].astype(np.int64, copy=False),
+                },
+            )
+            chunks.append(_normalize_rows(vectors.astype(np.float32, copy=False)))
+        return _concat_rows(chunks, model_name)
+
     model = _load_model(model_name)
     with torch.no_grad():
-        inputs = processor(text=[text], return_tensors="pt", padding=True)
-        vectors = model.get_text_features(**inputs)
-    return _to_numpy(vectors)
+        for start in range(0, len(texts), batch_size):
+            inputs = tokenizer(list(texts[start : start + batch_size]), return_tensors="pt", padding=True)
+            chunks.append(_to_numpy_rows(model.get_text_features(**_model_inputs(inputs, model))))
+    return _concat_rows(chunks, model_name)
+
+
+def warm_up(*, model_name: ModelName = "openai/clip-vit-base-patch32") -> None:
+    """Load the processor and model (or ONNX sessions) ahead of the first request.
+
+    Meant for app startup, off the event loop; with a single model load per
+    worker, the first user query no longer pays for ``from_pretrained``.
+    """
+    _load_processor(model_name)
+    if USE_ONNX:
+        _load_onnx_session(model_name, "image")
+        _load_onnx_session(model_name, "text")
+    else:
+        _load_model(model_name)
 
 
-__all__ = ["embed_image", "embed_text"]
+__all__ = [
+    "embed_image",
+    "embed_image_sources",
+    "embed_images",
+    "embed_pixel_values",
+    "embed_text",
+    "embed_texts",
+    "open_image_rgb",
+    "preprocess_images",
+    "warm_up",
+]
@@ -7,16 +7,108 @@ Uses local furniture.json catalog for reliable, fast searches.
 Enhanced with Claude AI for better query understanding.
 """
 
-import json
+import math
+import threading
+import time
+from collections import OrderedDict
 from typing import Any, Optional
 
 import chromadb
 import numpy as np
+import orjson
 
 from .embeddings import embed_text
 from .query_enhancer import enhance_furniture_query
 
 
+# Metadata fields Chroma stores as JSON strings (it only accepts scalar values)
+LIST_FIELDS = ("styleTags", "colors")
+
+
+def _parse_list_fields(metadata: dict[str, Any]) -> None:
+    """Decode JSON-encoded list fields in place; unparsable values become []."""
+    for key in LIST_FIELDS:
+        value = metadata.get(key)
+        if isinstance(value, (str, bytes)):
+            try:
+                metadata[key] = orjson.loads(value)
+            except orjson.JSONDecodeError:
+                metadata[key] = []
+
+
+# The furniture catalog is small enough to search in-process: vectors are pulled
+# from Chroma once and reused for this long before being refreshed.
+CATALOG_CACHE_TTL = 300.0
+# Chroma Cloud caps how many records one get() returns, so the catalog is read in pages.
+CATALOG_PAGE_SIZE = 300
+# User taste vectors are re-read from Chroma at most this often; /taste/update
+# writes through via remember_user_preference_vector so updates apply at once.
+USER_VECTOR_CACHE_TTL = 300.0
+# Least recently used entries are evicted past this many users.
+USER_VECTOR_CACHE_SIZE = 10_000
+
+
+class _CatalogMatrix:
+    """Every furniture vector as one (N, D) unit-row matrix plus parsed metadata."""
+    
+    def __init__(self, ids: list[str], embeddings: Any, metadatas: list[dict[str, Any]]):
+        self.ids = ids
+        self.metadatas = metadatas
+        for metadata in metadatas:
+            _parse_list_fields(metadata)
+        
+        matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        self.embeddings = matrix
+        
+        self.categories = np.array([metadata.get("category") for metadata in metadatas], dtype=object)
+        # Missing/non-numeric prices are NaN, which never passes a max_price filter
+        self.prices = np.array(
+            [
+                metadata["price"] if isinstance(metadata.get("price"), (int, float)) else np.nan
+                for metadata in metadatas
+            ],
+            dtype=np.float64,
+        )
+        self.loaded_at = time.monotonic()
+    
+    def top_k(self, query_vector: np.ndarray, category: Optional[str], filters: dict[str, Any], limit: int) -> list[dict[str, Any]]:
+        """Same semantics as the Chroma query: `where` filters, cosine similarity, best first."""
+        mask = np.ones(len(self.ids), dtype=bool)
+        if category:
+            mask &= self.categories == category
+        if filters.get("max_price"):
+            mask &= self.prices <= filters["max_price"]
+        candidates = np.flatnonzero(mask)
+        if candidates.size == 0 or limit <= 0:
+            return []
+        
+        # Score every row in one streaming pass and select afterwards; gathering
+        # the filtered rows first would copy them and double the bytes read
+        # Contiguous float32 on both sides keeps this on the BLAS sgemv kernel
+        query = np.ascontiguousarray(query_vector, dtype=np.float32)
+        scores = self.embeddings.dot(query)[candidates]
+        if candidates.size > limit:
+            best = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            best = np.arange(candidates.size)
+        best = best[np.argsort(-scores[best], kind="stable")]
+        
+        # Parsed list fields are copied so callers can't mutate the shared catalog
+        return [
+            {
+                "id": self.ids[candidates[index]],
+                "similarity_score": round(float(scores[index]), 4),
+                **{
+                    key: list(value) if isinstance(value, list) else value
+                    for key, value in self.metadatas[candidates[index]].items()
+                },
+            }
+            for index in best
+        ]
+
+
 class FurnitureSearchService:
     """Service for searching furniture using semantic embeddings."""
     
@@ -30,17 +122,81 @@ class FurnitureSearchService:
             "users",
             metadata={"hnsw:space": "cosine"}
         )
+        self._catalog: Optional[_CatalogMatrix] = None
+        self._user_vectors: OrderedDict[str, tuple[float, np.ndarray]] = OrderedDict()
+        self._user_vectors_lock = threading.Lock()
+    
+    def _get_catalog(self) -> Optional[_CatalogMatrix]:
+        """Local copy of the furniture vectors, refreshed every CATALOG_CACHE_TTL seconds."""
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() - catalog.loaded_at < CATALOG_CACHE_TTL:
+            return catalog
+        try:
+            ids: list[str] = []
+            embeddings: list[Any] = []
+            metadatas: list[dict[str, Any]] = []
+            offset = 0
+            while True:
+                page = self.furniture_collection.get(
+                    include=["embeddings", "metadatas"],
+                    limit=CATALOG_PAGE_SIZE,
+                    offset=offset,
+                )
+                page_ids = page.get("ids") or []
+                page_embeddings = page.get("embeddings")
+                if not page_ids or page_embeddings is None or len(page_embeddings) == 0:
+                    break
+                ids.extend(page_ids)
+                embeddings.extend(page_embeddings)
+                metadatas.extend(page.get("metadatas") or [{} for _ in page_ids])
+                if len(page_ids) < CATALOG_PAGE_SIZE:
+                    break
+                offset += len(page_ids)
+            if not ids:
+                return None
+            self._catalog = _CatalogMatrix(ids, embeddings, metadatas)
+        except Exception as e:
+            print(f"Warning: Could not load furniture catalog for local search: {e}")
+            # Keep serving the stale copy (if any) rather than failing the search
+        return self._catalog
+    
+    def _cache_user_vector(self, user_id: str, vector: np.ndarray) -> None:
+        with self._user_vectors_lock:
+            self._user_vectors[user_id] = (time.monotonic(), vector)
+            self._user_vectors.move_to_end(user_id)
+            while len(self._user_vectors) > USER_VECTOR_CACHE_SIZE:
+                self._user_vectors.popitem(last=False)
+    
+    def _cached_user_vector(self, user_id: str) -> Optional[np.ndarray]:
+        with self._user_vectors_lock:
+            cached = self._user_vectors.get(user_id)
+            if cached is None:
+                return None
+            if time.monotonic() - cached[0] >= USER_VECTOR_CACHE_TTL:
+                del self._user_vectors[user_id]
+                return None
+            self._user_vectors.move_to_end(user_id)
+            return cached[1]
+    
+    def remember_user_preference_vector(self, user_id: str, vector: np.ndarray) -> None:
+        """Cache a freshly written taste vector so the next search skips the Chroma read."""
+        self._cache_user_vector(user_id, np.array(vector, dtype="float32"))
     
     def get_user_preference_vector(self, user_id: str) -> Optional[np.ndarray]:
         """Retrieve user's taste preference vector from ChromaDB."""
+        cached = self._cached_user_vector(user_id)
+        if cached is not None:
+            return cached
         try:
             result = self.users_collection.get(
                 ids=[user_id],
                 include=["embeddings"]
             )
             embeddings = result.get("embeddings", [])
-            if embeddings and len(embeddings) > 0:
-                return np.array(embeddings[0], dtype="float32")
+            if embeddings is not None and len(embeddings) > 0:
+                vector = np.array(embeddings[0], dtype="float32")
+                self._cache_user_vector(user_id, vector)
+                return vector
         except Exception as e:
             print(f"Warning: Could not retrieve user preferences: {e}")
         return None
@@ -95,21 +251,25 @@ class FurnitureSearchService:
         if text_query:
             text_vec = embed_text(text_query)
             if query_vector is not None:
-                # Combine user preferences (60%) with text query (40%)
+                # Combine user preferences (60%) with text query (40%); both
+                # inputs are unit vectors, so only the blend needs renormalizing
                 query_vector = 0.6 * query_vector + 0.4 * text_vec
+                sq = float(np.vdot(query_vector, query_vector))
+                if sq > 0:
+                    query_vector *= 1.0 / math.sqrt(sq)
             else:
                 query_vector = text_vec
         
-        # 3. Normalize the query vector
-        if query_vector is not None:
-            norm = np.linalg.norm(query_vector)
-            if norm > 0:
-                query_vector = query_vector / norm
-        
         # If no query vector, return random sample
         if query_vector is None:
             return self._get_random_sample(category, limit, filters)
         
+        # Nearest-neighbour search in-process (one matrix-vector product) when
+        # the catalog is loaded; Chroma's remote query is the fallback
+        catalog = self._get_catalog()
+        if catalog is not None:
+            return catalog.top_k(query_vector, category, filters, limit)
+        
         # Build ChromaDB where clause for filtering
         where_clause = self._build_where_clause(category, filters)
         
@@ -117,7 +277,7 @@ class FurnitureSearchService:
         try:
             results = self.furniture_collection.query(
                 query_embeddings=[query_vector.tolist()],
-                n_results=limit * 2,  # Fetch more for filtering
+                n_results=limit,  # Filters are applied server-side via `where`
                 where=where_clause if where_clause else None,
                 include=["metadatas", "distances"]
             )
@@ -132,18 +292,7 @@ class FurnitureSearchService:
                 # Convert cosine distance to similarity score (0-1)
                 similarity = 1.0 - distance
                 
-                # Parse JSON fields back to lists
-                if "styleTags" in metadata:
-                    try:
-                        metadata["styleTags"] = json.loads(metadata["styleTags"])
-                    except:
-                        metadata["styleTags"] = []
-                
-                if "colors" in metadata:
-                    try:
-                        metadata["colors"] = json.loads(metadata["colors"])
-                    except:
-                        metadata["colors"] = []
+                _parse_list_fields(metadata)
                 
                 item = {
                     "id": item_id,
@@ -152,8 +301,7 @@ class FurnitureSearchService:
                 }
                 items.append(item)
             
-            # Return top results
-            return items[:limit]
+            return items
             
         except Exception as e:
             print(f"Error during furniture search: {e}")
@@ -173,18 +321,7 @@ class FurnitureSearchService:
             if ids and metadatas:
                 metadata = metadatas[0]
                 
-                # Parse JSON fields
-                if "styleTags" in metadata:
-                    try:
-                        metadata["styleTags"] = json.loads(metadata["styleTags"])
-                    except:
-                        metadata["styleTags"] = []
-                
-                if "colors" in metadata:
-                    try:
-                        metadata["colors"] = json.loads(metadata["colors"])
-                    except:
-                        metadata["colors"] = []
+                _parse_list_fields(metadata)
                 
                 return {
                     "id": ids[0],
@@ -233,18 +370,7 @@ class FurnitureSearchService:
             
             items = []
             for item_id, metadata in zip(ids, metadatas):
-                # Parse JSON fields
-                if "styleTags" in metadata:
-                    try:
-                        metadata["styleTags"] = json.loads(metadata["styleTags"])
-                    except:
-                        metadata["styleTags"] = []
-                
-                if "colors" in metadata:
-                    try:
-                        metadata["colors"] = json.loads(metadata["colors"])
-                    except:
-                        metadata["colors"] = []
+                _parse_list_fields(metadata)
                 
                 items.append({
                     "id": item_id,
@@ -261,6 +387,17 @@ class FurnitureSearchService:
 
 # Singleton instance for convenience
 _service_instance: Optional[FurnitureSearchService] = None
+_service_lock = threading.Lock()
+
+
+def get_furniture_service(chroma_client: chromadb.CloudClient) -> FurnitureSearchService:
+    """Return the shared search service, creating it on first use."""
+    global _service_instance
+    if _service_instance is None:
+        with _service_lock:
+            if _service_instance is None:
+                _service_instance = FurnitureSearchService(chroma_client)
+    return _service_instance
 
 
 def search_furniture_semantically(
@@ -283,15 +420,17 @@ def search_furniture_semantically(
             limit=5
         )
     """
-    global _service_instance
-    
-    if _service_instance is None:
-        _service_instance = FurnitureSearchService(chroma_client)
-    
-    return _service_instance.search(
+    return get_furniture_service(chroma_client).search(
         user_id=user_id,
         text_query=text_query,
         category=category,
         limit=limit,
         **filters
     )
+
+
+def remember_user_preference_vector(
+    chroma_client: chromadb.CloudClient, user_id: str, vector: np.ndarray
+) -> None:
+    """Write-through for the shared search service's user-vector cache."""
+    get_furniture_service(chroma_client).remember_user_preference_vector(user_id, vector)
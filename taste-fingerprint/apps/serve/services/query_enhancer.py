@@ -7,6 +7,7 @@ for more accurate semantic search.
 """
 
 import os
+import copy
 import json
 from typing import Any, Optional
 from anthropic import Anthropic
@@ -19,6 +20,9 @@ ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 if not ANTHROPIC_API_KEY:
     print("Warning: ANTHROPIC_API_KEY not set. Query enhancement will be disabled.")
 
+# Parsed queries are deterministic (temperature 0), so repeats skip the API call
+ENHANCEMENT_CACHE_SIZE = 1024
+
 
 class QueryEnhancementService:
     """Uses Claude to parse and enhance natural language furniture queries."""
@@ -30,6 +34,7 @@ class QueryEnhancementService:
         else:
             self.client = None
             self.enabled = False
+        self._cache: dict[str, dict[str, Any]] = {}
     
     def enhance_query(self, text_query: str) -> dict[str, Any]:
         """
@@ -62,6 +67,11 @@ class QueryEnhancementService:
                 "colors": []
             }
         
+        cached = self._cache.get(text_query)
+        if cached is not None:
+            # Callers may mutate the lists in the result
+            return copy.deepcopy(cached)
+        
         try:
             # Prompt Claude to extract structured information
             response = self.client.messages.create(
@@ -110,6 +120,9 @@ Be concise. Only include fields with confident values.""",
             enhanced.setdefault("colors", [])
             enhanced.setdefault("dimensions_hint", None)
             
+            if len(self._cache) >= ENHANCEMENT_CACHE_SIZE:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[text_query] = copy.deepcopy(enhanced)
             return enhanced
             
         except Exception as e:
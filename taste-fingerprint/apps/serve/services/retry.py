@@ -0,0 +1,32 @@
+"""Classify errors from Chroma / HTTP calls as worth retrying or not."""
+
+from __future__ import annotations
+
+import httpx
+
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+def _status_code(exc: BaseException) -> int | None:
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code
+    # chromadb maps HTTP failures to ChromaError subclasses exposing code()
+    code = getattr(exc, "code", None)
+    if callable(code):
+        try:
+            value = code()
+        except Exception:
+            return None
+        return value if isinstance(value, int) else None
+    return None
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """True for connection/timeout failures and 429/5xx responses.
+
+    Validation, auth and dimension-mismatch errors fail the same way on every
+    attempt, so callers should raise them immediately instead of backing off.
+    """
+    if isinstance(exc, (httpx.TransportError, ConnectionError, TimeoutError)):
+        return True
+    return _status_code(exc) in RETRYABLE_STATUS
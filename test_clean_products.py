@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Regression tests for catalog cleaning heuristics in ``clean_products.py``."""
+
+from __future__ import annotations
+
+import importlib.util
+import sys
+from pathlib import Path
+
+import pytest  # type: ignore[import-not-found]
+
+
+_MODULE_PATH = (
+    Path(__file__).resolve().parent
+    / "taste-fingerprint"
+    / "apps"
+    / "serve"
+    / "scripts"
+    / "clean_products.py"
+)
+
+_SPEC = importlib.util.spec_from_file_location("clean_products", _MODULE_PATH)
+if _SPEC is None or _SPEC.loader is None:  # pragma: no cover - import guard
+    raise ImportError(f"Unable to load clean_products from {_MODULE_PATH}")
+
+_MODULE = importlib.util.module_from_spec(_SPEC)
+# dataclasses resolve annotations through sys.modules
+sys.modules[_SPEC.name] = _MODULE
+_SPEC.loader.exec_module(_MODULE)
+parse_dimensions = getattr(_MODULE, "parse_dimensions")
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "12 inches; 5 Pounds; 3 pieces",
+        "30x70 Inch (Pack of 1)",
+        "3+2+1",
+        "27 inches, 17 inches, 19 inches, 18 inches",
+        "",
+    ],
+)
+def test_parse_dimensions_rejects_non_dimension_text(text: str) -> None:
+    """Numbers not separated by x/×/* are never read as W/D/H."""
+
+    assert parse_dimensions(text) is None
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ('1 pc(11"D x 14.96"W x 23.6"H)', {"d": 11.0, "w": 14.96, "h": 23.6}),
+        ('32"D x 80"W x 35"H', {"d": 32.0, "w": 80.0, "h": 35.0}),
+        ('20"Wx30"Dx40"H', {"d": 30.0, "w": 20.0, "h": 40.0}),
+        ("24 × 18 × 30", {"d": 24.0, "w": 18.0, "h": 30.0}),
+    ],
+)
+def test_parse_dimensions_reads_separated_values(text: str, expected: dict[str, float]) -> None:
+    assert parse_dimensions(text) == expected
+
+
+def test_parse_dimensions_ignores_inline_conversion() -> None:
+    """A parenthesised metric conversion stays with the value it annotates."""
+
+    dims = parse_dimensions("Width 20 in (50 cm) x 30 x 40")
+
+    assert dims is not None
+    assert 20.0 in dims.values()
+    assert round(50 / 2.54, 2) not in dims.values()